@@ -0,0 +1,66 @@
+"""
+Benchmark de la extracción HTML contra la implementación anterior (bs4).
+
+    python benchmarks/bench_html_extraction.py [--repeat N]
+
+Usa el corpus de tests/corpus (más los correos del cache local si existe) y
+verifica de paso que ambas implementaciones den el mismo resultado.
+"""
+from __future__ import annotations
+
+import sys
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "tests")]
+
+from corpus_loader import alert_email_corpus, computrabajo_page_corpus  # noqa: E402
+from test_computrabajo_extraction import bs4_extract_description  # noqa: E402
+from test_html_link_extractor import bs4_anchor_pairs  # noqa: E402
+from utils.get_computrabajo_description import _extract_description_from_job_html  # noqa: E402
+from utils.html_link_extractor import extract_anchor_pairs  # noqa: E402
+
+
+def _description_only(html: str) -> str:
+    return _extract_description_from_job_html(html)[0]
+
+
+def _time_per_doc(fn, docs: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in docs:
+            fn(doc)
+        best = min(best, time.perf_counter() - start)
+    return best / max(1, len(docs)) * 1000
+
+
+def _report(title: str, docs: list[tuple[str, str]], old, new, repeat: int) -> None:
+    htmls = [html for _, html in docs]
+    mismatches = [name for name, html in docs if old(html) != new(html)]
+    old_ms = _time_per_doc(old, htmls, repeat)
+    new_ms = _time_per_doc(new, htmls, repeat)
+    size = sum(len(h) for h in htmls) / max(1, len(htmls)) / 1024
+    print(f"{title}: {len(htmls)} documentos (~{size:.0f} KB c/u)")
+    print(f"  bs4     : {old_ms:8.2f} ms/doc")
+    print(f"  actual  : {new_ms:8.2f} ms/doc  (x{old_ms / new_ms:.1f})")
+    print(f"  distintos: {len(mismatches)} {mismatches[:5] if mismatches else ''}")
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    _report("Links de alertas", alert_email_corpus(), bs4_anchor_pairs, extract_anchor_pairs, args.repeat)
+    pages = computrabajo_page_corpus()
+    _report("Descripciones de Computrabajo", pages, bs4_extract_description, _description_only, args.repeat)
+    # el camino rápido (JSON-LD) por separado: el resto paga un parseo igual que antes
+    jsonld = [(name, html) for name, html in pages if _extract_description_from_job_html(html)[1] == "jsonld"]
+    _report("  ... solo paginas con JSON-LD", jsonld, bs4_extract_description, _description_only, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,87 @@
 from google.genai.types import CompletionStatsOrDict, ImportFileConfigOrDict
 from utils.MACROS import CLEANED_OFFERS_PATH
 from utils.get_last_offers import get_last_offers
-from time import sleep
-from typing import List
-from utils.Offer import Offer
 from utils.load_offers_from_excel import load_offers_from_excel
 from utils.offer_filter_handler import offer_filter_handler
 from utils.remove_duplicated_offers import remove_duplicated_offers
+from utils.seen_offer_index import SeenOfferIndex
+from utils.failure_ledger import FailureLedger
 from utils.write_offers_to_excel import write_offers_to_excel
 from utils.offer_list_affinity_handler import offer_list_affinity_handler
+from utils.offer_list_description_handler import offer_list_description_handler
 from utils.logging import success,error
-from sys import argv, exception
+from sys import exception
+from argparse import ArgumentParser
 
 # PIPELINE PRINCIPAL
 
+def parse_args():
+    parser = ArgumentParser(description="Pipeline de filtrado de ofertas de trabajo")
+    parser.add_argument("N", type=int, nargs="?", help="cantidad de correos a traer por remitente")
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=None,
+        help="trae todos los correos de alertas de los ultimos D dias (una sola busqueda)",
+    )
+    parser.add_argument(
+        "--full-scan",
+        action="store_true",
+        help="ignora el checkpoint IMAP y vuelve a procesar los ultimos N correos",
+    )
+    parser.add_argument(
+        "--imap-workers",
+        type=int,
+        default=1,
+        help="conexiones IMAP en paralelo para descargar correos (backfills grandes)",
+    )
+    parser.add_argument(
+        "--fetch-mode",
+        choices=("raw", "structure"),
+        default="raw",
+        help="raw: primeros 200KB de cada correo; structure: solo headers + partes HTML/texto",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="procesos para parsear correos en paralelo con la descarga (0 = en linea)",
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="no descarga correos: reconstruye las ofertas desde el cache local",
+    )
+    parser.add_argument(
+        "--no-raw-cache",
+        action="store_true",
+        help="no guarda ni lee los correos descargados del cache local",
+    )
+    parser.add_argument(
+        "--no-http-cache",
+        action="store_true",
+        help="descarga las descripciones sin usar el cache HTTP local",
+    )
+    args = parser.parse_args()
+    if args.N is None and args.days is None and not args.replay:
+        parser.error("indica N (cantidad de correos), --days o --replay")
+    return args
+
+
 if __name__ == "__main__":
     try:
-        N = int(argv[1])
-        print(f"Buscando las ultimas {N} ofertas")
-    except:
+        args = parse_args()
+        N = args.N if args.N is not None else 50
+        if args.replay:
+            print("Reconstruyendo ofertas desde el cache local de correos")
+        elif args.days is not None:
+            print(f"Buscando las ofertas de los ultimos {args.days} dias")
+        else:
+            print(f"Buscando las ultimas {N} ofertas")
+    except SystemExit as e:
+        # --help (y cualquier salida normal de argparse) sale con codigo 0
+        if e.code in (0, None):
+            raise
         error("Error procesando el parametro requerido !")
         exit(-1)
 
@@ -27,38 +90,56 @@ if __name__ == "__main__":
     old_offers = load_offers_from_excel(CLEANED_OFFERS_PATH)
     success(f"Se cargaron {len(old_offers)} ofertas viejas")
 
-    print(f"Cargando ofertas de los ultimos {N} correos")
-    offers_list : List[Offer] = get_last_offers(limit=N) 
-    success(f"Ofertas nuevas detectadas : {len(offers_list)}")
+    # Indice de ofertas conocidas: la ingesta descarta lo que ya esta en el excel o en el historial
+    seen_index = SeenOfferIndex.load()
+    seen_index.add_offers(old_offers)
+
+    if args.days is not None:
+        print(f"Cargando ofertas de los correos de los ultimos {args.days} dias")
+    else:
+        print(f"Cargando ofertas de los ultimos {N} correos")
+    offers_list, pending_checkpoint = get_last_offers(
+        limit=N,
+        incremental=not args.full_scan,
+        imap_workers=args.imap_workers,
+        fetch_mode=args.fetch_mode,
+        days=args.days,
+        parse_workers=args.parse_workers,
+        raw_cache=not args.no_raw_cache,
+        replay=args.replay,
+        seen_index=seen_index,
+    )
+    success(f"Ofertas nuevas detectadas : {len(offers_list)} (ya conocidas, omitidas: {seen_index.skipped})")
+
+    # Las ofertas cuya descripcion fallo en corridas anteriores vuelven cuando toca reintentarlas
+    failure_ledger = FailureLedger.load()
+    retry_offers = failure_ledger.due_offers()
+    if retry_offers:
+        print(f"Reintentando {len(retry_offers)} ofertas con fallos anteriores")
 
     print("Fusionando ofertas")
-    total_offers = old_offers + offers_list
+    total_offers = old_offers + offers_list + retry_offers
     print("Limpiando duplicados entre ofertas viejas y nuevas")
     cleaned_total_offers = remove_duplicated_offers(total_offers)
     success(f"Se encontraron {len(total_offers)-len(cleaned_total_offers)} duplicados")
 
 
-    # Se recorren todas las ofertas y para cada una
-    for offer in cleaned_total_offers:
-        if not offer.description:
-            try:
-                print(f"Ajustando la descripcion de la oferta : {offer.link[:50]}")
-                # Se accede a linkedin, se extrae la description de la oferta y se setea
-                offer.set_description()
-                success(f"Se ajusto la descripcion de la oferta : {offer.link[:50]}")
-            except Exception as e:
-                error(f"ERROR ajustando oferta {offer.link[:50]} perteneciente a **{offer.father_mail_subject[:30]}** ")
-                error(str(e))
-            sleep(5)
-        else:
-            print(f"Saltando oferta {offer.link[:50]} por que ya cuenta con descripcion")
+    # Se buscan las descripciones faltantes (en paralelo, con limites por fuente)
+    print("Buscando descripciones de las ofertas")
+    ok, failed = offer_list_description_handler(
+        cleaned_total_offers,
+        http_cache=not args.no_http_cache,
+        ledger=failure_ledger,
+    )
+    failure_ledger.save()
+    success(f"Descripciones ajustadas : {ok} | errores : {failed}")
 
     # Se eliminan las ofertas cuya descripcion no pudo ser encontrada
     cleaned_total_offers = offer_filter_handler(cleaned_total_offers)
 
     write_offers_to_excel(cleaned_total_offers, CLEANED_OFFERS_PATH)
 
-    # Luego de cargar todas las descripciones de todas las ofertas, enviamos prompts a gemini en batches de 10 en 10
+    # Luego de cargar todas las descripciones de todas las ofertas, enviamos prompts a gemini en batches armados por tokens
 
     print("Empezando a generar afinidad para cada oferta")
     offer_list_affinity_handler(cleaned_total_offers)
@@ -66,4 +147,15 @@ if __name__ == "__main__":
     print(f"Guardando {len(cleaned_total_offers)} en el excel")
     write_offers_to_excel(cleaned_total_offers, CLEANED_OFFERS_PATH)
 
+    seen_index.add_offers(cleaned_total_offers)
+    # los links con fallo permanente tampoco se vuelven a ingerir
+    for link in failure_ledger.permanent_links():
+        seen_index.add(link)
+    seen_index.save()
+
+    # recien con las ofertas nuevas en el excel (y las fallidas en el ledger) el
+    # checkpoint IMAP puede pasar sus correos: un corte antes no pierde ofertas
+    if pending_checkpoint is not None:
+        pending_checkpoint.save()
+
     print("Fin del pipeline ...")
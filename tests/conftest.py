@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# los tests importan `utils.*` desde la raiz del repo
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
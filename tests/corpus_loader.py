@@ -0,0 +1,53 @@
+"""
+Corpus para los chequeos de equivalencia y los benchmarks de extracción HTML.
+
+- tests/corpus/alert_emails/*.html: alertas de LinkedIn/Computrabajo guardadas.
+- Si existe el cache local de correos (RAW_EMAIL_CACHE_DIR), se suma el HTML de
+  hasta `limit` correos reales cacheados, así en la máquina del pipeline la
+  comparación corre también sobre las alertas de verdad.
+"""
+from __future__ import annotations
+
+import email
+from pathlib import Path
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+ROOT = CORPUS_DIR.parent.parent
+
+
+def _saved(subdir: str) -> list[tuple[str, str]]:
+    return [
+        (path.name, path.read_text(encoding="utf-8"))
+        for path in sorted((CORPUS_DIR / subdir).glob("*.html"))
+    ]
+
+
+def cached_alert_htmls(limit: int = 200) -> list[tuple[str, str]]:
+    from utils.MACROS import RAW_EMAIL_CACHE_DIR
+    from utils.get_last_offers import _extract_body
+    from utils.raw_email_cache import read_cached_email
+
+    root = Path(RAW_EMAIL_CACHE_DIR)
+    if not root.is_absolute():
+        root = ROOT / root
+    if not root.exists():
+        return []
+    out: list[tuple[str, str]] = []
+    for path in sorted(root.glob("*/*/*.eml.gz"), reverse=True):
+        raw = read_cached_email(path)
+        if not raw:
+            continue
+        _text, html = _extract_body(email.message_from_bytes(raw))
+        if html:
+            out.append((f"cache:{path.parent.parent.name}/{path.parent.name}/{path.name}", html))
+        if len(out) >= limit:
+            break
+    return out
+
+
+def alert_email_corpus(limit: int = 200) -> list[tuple[str, str]]:
+    return _saved("alert_emails") + cached_alert_htmls(limit)
+
+
+def computrabajo_page_corpus() -> list[tuple[str, str]]:
+    return _saved("computrabajo_pages")
@@ -0,0 +1,112 @@
+"""
+El extractor de descripciones de Computrabajo (JSON-LD por regex + html_to_text,
+un solo parseo de respaldo) debe dar el mismo texto que la versión anterior,
+que parseaba todo con BeautifulSoup("html.parser").
+"""
+import json
+import random
+import re
+
+import pytest
+from bs4 import BeautifulSoup
+
+from corpus_loader import computrabajo_page_corpus
+from utils.get_computrabajo_description import _extract_description_from_job_html, clean_text
+from utils.html_text import html_to_text
+
+
+def bs4_extract_description(html: str) -> str:
+    """Implementación anterior de _extract_description_from_job_html (referencia)."""
+    soup = BeautifulSoup(html or "", "html.parser")
+
+    for s in soup.find_all("script", attrs={"type": re.compile(r"application/ld\+json", re.I)}):
+        try:
+            raw = (s.string or s.get_text() or "").strip()
+            if not raw:
+                continue
+            data = json.loads(raw)
+            objs = data if isinstance(data, list) else [data]
+            for obj in objs:
+                if not isinstance(obj, dict):
+                    continue
+                if obj.get("@type") == "JobPosting" and isinstance(obj.get("description"), str):
+                    desc_text = BeautifulSoup(obj["description"], "html.parser").get_text("\n")
+                    desc_text = clean_text(desc_text)
+                    if len(desc_text) >= 120:
+                        return desc_text
+        except Exception:
+            pass
+
+    selectors = [
+        "#jobDescriptionText",
+        ".box_detail .box_detail_text",
+        ".box_detail .text",
+        ".box_detail",
+        ".detalle_oferta",
+        ".detalle",
+        "section#detail",
+        "div#detail",
+        "article",
+        "main",
+    ]
+    best = ""
+    for sel in selectors:
+        el = soup.select_one(sel)
+        if not el:
+            continue
+        txt = clean_text(el.get_text("\n"))
+        if len(txt) > len(best):
+            best = txt
+
+    if not best or len(best) < 120:
+        whole = clean_text(soup.get_text("\n"))
+        m = re.search(r"\bDescripci[oó]n\b[:\s]*\n(.+)", whole, flags=re.IGNORECASE | re.DOTALL)
+        if m:
+            candidate = clean_text(m.group(1))
+            candidate = re.split(
+                r"\n(?:Requisitos|Beneficios|Salario|Acerca de la empresa|"
+                r"Sobre la empresa|Detalles|Postular|Inscribirse)\b",
+                candidate,
+                maxsplit=1,
+                flags=re.IGNORECASE,
+            )[0]
+            candidate = clean_text(candidate)
+            if len(candidate) > len(best):
+                best = candidate
+    return best
+
+
+CORPUS = computrabajo_page_corpus()
+
+EXPECTED_STRATEGY = {
+    "jsonld_jobposting.html": "jsonld",
+    "jsonld_list_graph.html": "jsonld",
+    "short_jsonld_falls_back.html": "selector",
+    "broken_jsonld_entities.html": "selector",
+    "no_jsonld_box_detail.html": "selector",
+    "heading_only_layout.html": "heading",
+    "unknown_layout.html": "none",
+}
+
+
+@pytest.mark.parametrize("name,html", CORPUS, ids=[name for name, _ in CORPUS])
+def test_same_description_as_bs4_on_corpus(name, html):
+    desc, strategy = _extract_description_from_job_html(html)
+    assert desc == bs4_extract_description(html)
+    assert strategy == EXPECTED_STRATEGY[name]
+
+
+_FUZZ_TOKENS = [
+    "<p>", "</p>", "<br>", "<br/>", "<b>", "</b>", "<ul>", "<li>", "</li>", "</ul>", "<div>", "</div>",
+    "<script>x</script>", "<style>.a{{}}</style>", "<template>t</template>", "<template>", "</template>", "<!-- c -->",
+    "<![CDATA[cd]]>", "<!DOCTYPE html>", "&amp;", "&nbsp;", "&oacute;", "&#243;", "&bogus;", "&#150;", "&#x41;", "&copy", "<pre>", "</pre>",
+    "texto{n}", " ", "\n", "\t", "<img src=x>", "<span>", "</span>", "</a>",
+]
+
+
+def test_html_to_text_matches_bs4_get_text():
+    rnd = random.Random(11)
+    for _ in range(3000):
+        html = "".join(rnd.choice(_FUZZ_TOKENS).format(n=rnd.randint(0, 9)) for _ in range(rnd.randint(1, 30)))
+        for sep in ("\n", " ", ""):
+            assert html_to_text(html, sep) == BeautifulSoup(html, "html.parser").get_text(sep), html
@@ -0,0 +1,74 @@
+"""
+extract_anchor_pairs debe dar exactamente los mismos (href, texto) que el
+código anterior basado en BeautifulSoup("html.parser").
+"""
+import random
+
+import pytest
+from bs4 import BeautifulSoup
+
+from corpus_loader import alert_email_corpus
+from utils.html_link_extractor import extract_anchor_pairs, has_job_hosts
+from utils.job_sources import job_host_markers
+
+
+def bs4_anchor_pairs(html: str) -> list[tuple[str, str]]:
+    """Implementación anterior de _extract_links_from_html_with_text (referencia)."""
+    if not html:
+        return []
+    soup = BeautifulSoup(html, "html.parser")
+    pairs: list[tuple[str, str]] = []
+    for a in soup.find_all("a", href=True):
+        href = (a.get("href") or "").strip()
+        if not href:
+            continue
+        anchor_text = " ".join(a.get_text(" ", strip=True).split())
+        pairs.append((href, anchor_text))
+    return pairs
+
+
+CORPUS = alert_email_corpus()
+
+
+@pytest.mark.parametrize("name,html", CORPUS, ids=[name for name, _ in CORPUS])
+def test_same_pairs_as_bs4_on_corpus(name, html):
+    assert extract_anchor_pairs(html) == bs4_anchor_pairs(html)
+
+
+@pytest.mark.parametrize("html", [
+    # bs4 guarda <![CDATA[...]]> como CData aun dentro de <template>: cuenta como texto
+    '<a href="x"><template><![CDATA[hi]]></template>t</a>',
+    '<template><a href="x"><![CDATA[hi]]>t</a></template>',
+    '<a href="x"><template><b><![CDATA[hi]]></b></template>t</a>',
+    # dentro de <script>/<style> es texto crudo del tag, no cuenta
+    '<a href="x"><script><![CDATA[hi]]></script>t</a>',
+    '<a href="x"><style><![CDATA[hi]]></style>t</a>',
+])
+def test_cdata(html):
+    assert extract_anchor_pairs(html) == bs4_anchor_pairs(html)
+
+
+_FUZZ_TOKENS = [
+    '<a href="https://www.linkedin.com/jobs/view/{n}">', '<a href="">', '<a>', '</a>',
+    '<b>', '</b>', '<div>', '</div>', '<p>', '</p>', '<br>', '<br/>', '<img src=x>',
+    '<template>', '</template>', '<script>', '</script>', '<style>', '</style>',
+    '<![CDATA[cd{n}]]>', '<!-- c -->', '<!DOCTYPE html>', '<?pi?>',
+    'text{n} ', ' &amp; ', '&nbsp;', '  \n ', '<td>', '</td>', '<table>', '</table>',
+    '<a href="/x{n}"/>', '<span>', '</span>', '&bogus;', '&#150;', '&#x41;', '&oacute', '&copy;x',
+]
+
+
+def test_same_pairs_as_bs4_on_random_fragments():
+    rnd = random.Random(7)
+    for _ in range(3000):
+        html = "".join(rnd.choice(_FUZZ_TOKENS).format(n=rnd.randint(0, 9)) for _ in range(rnd.randint(1, 30)))
+        assert extract_anchor_pairs(html) == bs4_anchor_pairs(html), html
+
+
+def test_has_job_hosts():
+    markers = job_host_markers()
+    for name, html in CORPUS:
+        if name.startswith(("linkedin", "computrabajo")):
+            assert has_job_hosts(html, markers)
+    assert not has_job_hosts("<a href='https://example.com'>x</a>", markers)
+    assert not has_job_hosts("", markers)
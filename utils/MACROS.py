@@ -81,14 +81,15 @@ DESCRIPTION: <texto de la oferta>
 
 ### Tu salida (CRÍTICO)
 
-Responde **SOLO** con una única línea, sin texto adicional, sin saltos de línea:
+Responde **SOLO** con un arreglo JSON, un objeto por oferta, sin texto adicional:
 
 ```
-uuid_calificacion;uuid_calificacion;uuid_calificacion;...
+[{"id": "<uuid>", "score": <calificacion>}, ...]
 ```
 
-* Calificación: entero **1–10**
-* Respeta el orden
+* `id`: el OFFER_ID exacto de la oferta
+* `score`: entero **1–10**
+* Una entrada por cada oferta recibida, ninguna más
 * Si dudas, **penaliza**, no seas optimista
 
 ---
@@ -140,7 +141,17 @@ Experimentos: Fashion-MNIST (MLP PyTorch), MNIST (MLP TensorFlow).
 """
 
 
-OFFER_BATCH_SIZE = 30
+# armado de batches para gemini por tokens (estimados) en lugar de una cantidad fija de ofertas:
+#   entrada: tokens de descripciones por request; salida: tokens de respuesta por request
+#   (cada oferta responde ~GEMINI_OUTPUT_TOKENS_PER_OFFER); descripciones mas largas que
+#   GEMINI_MAX_DESCRIPTION_TOKENS se recortan
+GEMINI_BATCH_INPUT_TOKENS = 40_000
+GEMINI_BATCH_OUTPUT_TOKENS = 2_000
+GEMINI_OUTPUT_TOKENS_PER_OFFER = 20
+GEMINI_MAX_DESCRIPTION_TOKENS = 3_000
+# calibracion caracteres/token (count_tokens sobre una muestra, acumulada entre corridas)
+GEMINI_TOKEN_CALIBRATION_PATH = "./data/gemini_tokens.json"
+GEMINI_CALIBRATION_SAMPLE = 8
 
 OFFER_COLUMNS = [
     "id",
@@ -149,9 +160,106 @@ OFFER_COLUMNS = [
     "father_mail_subject",
     "affinity",
     "description",
+    "description_hash",
 ]
 
+# columnas nuevas: un excel viejo sin ellas se sigue pudiendo leer
+OPTIONAL_OFFER_COLUMNS = ["description_hash"]
+
 REQUIRED_COLUMNS = ["link", "reception_date", "father_mail_subject"]
 
 CLEANED_OFFERS_PATH = "./data/cleaned_offers.xlsx"
 
+
+IMAP_CHECKPOINT_PATH = "./data/imap_checkpoint.json"
+
+IMAP_FETCH_CHUNK_SIZE = 100
+
+# Gmail permite ~15 conexiones IMAP simultaneas por cuenta; nos quedamos lejos
+IMAP_MAX_CONNECTIONS = 4
+
+# tope por parte de texto/HTML en el fetch guiado por BODYSTRUCTURE
+IMAP_MAX_PART_BYTES = 1_000_000
+
+# chunks descargados que pueden esperar en cola antes de ser parseados
+PARSE_QUEUE_SIZE = 4
+
+RAW_EMAIL_CACHE_DIR = "./data/raw_email_cache"
+# fetch "raw": bytes del mensaje que se piden (BODY.PEEK[]<0.N>)
+RAW_FETCH_MAX_BYTES = 200_000
+
+# memo de canonicalización de links (LRU en memoria + mapeo persistente)
+LINK_CACHE_SIZE = 50_000
+LINK_CACHE_PATH = "./data/link_cache.json"
+LINK_CACHE_PERSIST_MAX = 200_000
+
+# índice persistente de ofertas conocidas (se consulta durante la ingesta)
+SEEN_OFFERS_PATH = "./data/seen_offers.json"
+SEEN_OFFERS_BLOOM_THRESHOLD = 200_000
+SEEN_OFFERS_BLOOM_ERROR_RATE = 0.0001
+
+# descargas de descripciones: hilos en paralelo por fuente
+DESCRIPTION_MAX_CONCURRENCY = {
+    "LINKEDIN": 1,
+    "COMPUTRABAJO": 4,
+}
+
+# rate limiter adaptativo por fuente (requests/segundo); la tasa aprendida se persiste
+RATE_LIMITS = {
+    "LINKEDIN": {"rate": 0.2, "min_rate": 0.01, "max_rate": 0.5},
+    "COMPUTRABAJO": {"rate": 1.0, "min_rate": 0.05, "max_rate": 4.0},
+}
+RATE_LIMITS_STATE_PATH = "./data/rate_limits.json"
+# una tasa aprendida por debajo de "rate" vuelve hacia ella entre corridas: a la mitad
+# (en escala logaritmica) cada RATE_LIMIT_RECOVERY_HALF_LIFE segundos
+RATE_LIMIT_RECOVERY_HALF_LIFE = 3600
+# y ninguna corrida arranca por debajo de esta fraccion de "rate"
+RATE_LIMIT_START_MIN_FRACTION = 0.25
+
+# clientes HTTP compartidos por fuente (keep-alive): conexiones por host y timeout (s)
+HTTP_MAX_CONNECTIONS = 8
+HTTP_TIMEOUT = 20
+
+# cache HTTP en disco de descripciones (Computrabajo HTML / Voyager JSON); TTL en segundos
+HTTP_CACHE_DIR = "./data/http_cache"
+HTTP_CACHE_TTL = 3 * 24 * 3600
+# entradas sin escribir ni renovar hace mas de esto se borran al final de cada corrida
+HTTP_CACHE_MAX_AGE = 30 * 24 * 3600
+
+# mapeo persistente {link de tracking -> URL real de la oferta} (Computrabajo)
+REDIRECT_CACHE_PATH = "./data/redirects.json"
+
+# ledger de descripciones fallidas: espera exponencial entre reintentos (s) y tope de intentos
+FAILURE_LEDGER_PATH = "./data/failure_ledger.json"
+FAILURE_RETRY_BASE = 6 * 3600
+FAILURE_RETRY_MAX = 7 * 24 * 3600
+FAILURE_MAX_ATTEMPTS = 6
+# fallos ajenos a la oferta (bloqueos, cookies faltantes): espera sin Retry-After, no suman intentos
+FAILURE_BLOCKED_RETRY = 3600
+
+# descargas de páginas de ofertas: tope de bytes por página y content-types aceptados
+HTTP_MAX_PAGE_BYTES = 2_000_000
+HTTP_PAGE_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# gemini: modelo, batches en vuelo a la vez y presupuesto (requests por minuto / por día)
+GEMINI_MODEL = "gemini-2.5-flash"
+GEMINI_MAX_CONCURRENCY = 4
+GEMINI_RPM = 10
+GEMINI_RPD = 250
+GEMINI_MAX_RETRIES = 3
+# veces que una oferta puede volver a la cola por faltar (o ser invalida) en la respuesta de gemini
+GEMINI_MAX_SCORE_ATTEMPTS = 3
+GEMINI_USAGE_PATH = "./data/gemini_usage.json"
+
+# instrucciones fijas (BASE_PROMPT y CV) hacia gemini:
+#   "inline" -> en cada prompt, "system" -> system_instruction, "cache" -> cached content con TTL
+# el cache explicito no existe en el nivel gratuito de la API: "cache" solo con una cuenta paga
+GEMINI_PROMPT_MODE = "system"
+GEMINI_CV_PATH = None  # p.ej. "./cv.pdf": se sube una vez y acompaña a las instrucciones
+GEMINI_CACHE_TTL = 3600
+GEMINI_CONTEXT_STATE_PATH = "./data/gemini_context.json"
+
+# afinidades ya calculadas por (descripcion, prompt, modelo); al cambiar el prompt
+# se recalculan a lo sumo GEMINI_RESCORE_PER_RUN descripciones por corrida (las mas viejas primero)
+AFFINITY_CACHE_PATH = "./data/affinity_cache.json"
+GEMINI_RESCORE_PER_RUN = 100
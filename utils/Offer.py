@@ -1,8 +1,6 @@
 from __future__ import annotations
-from utils.get_computrabajo_description import get_computrabajo_description
-from utils.get_linkedin_description import get_linkedin_description
 import hashlib
-from utils.OfferTypeEnum import OfferTypeEnum
+from utils.description_store import descriptions
 
 class Offer:
     def __init__(self, link, reception_date, father_mail_subject, type_) -> None:
@@ -11,9 +9,19 @@ class Offer:
         self.reception_date = reception_date
         self.father_mail_subject = father_mail_subject
         self.affinity = None
-        self.description = None
+        # la descripcion vive normalizada y comprimida en el store compartido;
+        # la oferta solo guarda su hash (ofertas con el mismo texto comparten copia)
+        self.description_hash = None
         self.type = type_
 
+    @property
+    def description(self):
+        return descriptions.get(self.description_hash)
+
+    @description.setter
+    def description(self, text):
+        self.description_hash = descriptions.put(text) if text else None
+
     def __str__(self) -> str:
         return f"""
             __________________________________________
@@ -28,11 +36,9 @@ class Offer:
             |   Description     : {self.description[:5]+'...' if self.description else self.description}
             __________________________________________
         """
-    def set_description(self):
-        if self.type == OfferTypeEnum.LINKEDIN:
-            self.description = get_linkedin_description(self.link)
-        elif self.type == OfferTypeEnum.COMPUTRABAJO:
-            self.description = get_computrabajo_description(self.link)
+    def set_description(self, use_cache=True, throttle=None):
+        # self.type es la fuente (utils.job_sources.JobSource): ella sabe como bajar la descripcion
+        self.description = self.type.fetch_description(self.link, use_cache=use_cache, throttle=throttle)
 
 
 
@@ -1,6 +0,0 @@
-
-from enum import Enum
-
-class OfferTypeEnum(Enum):
-    LINKEDIN = 1
-    COMPUTRABAJO = 2
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import hashlib
+import time
+
+from utils.MACROS import AFFINITY_CACHE_PATH, BASE_PROMPT, GEMINI_CV_PATH, GEMINI_MODEL
+from utils.json_store import load_json, save_json
+
+
+def current_prompt_hash(cv_path: str | None = GEMINI_CV_PATH) -> str:
+    """Version del prompt: cambia si cambian BASE_PROMPT o el CV que lo acompaña."""
+    h = hashlib.sha1(BASE_PROMPT.encode("utf-8"))
+    if cv_path:
+        try:
+            with open(cv_path, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            pass
+    return h.hexdigest()[:12]
+
+
+class AffinityCache:
+    """
+    Afinidad ya calculada por descripcion (description_hash), junto al hash del
+    prompt y el modelo que la produjeron. Se persiste entre corridas.
+
+    Una entrada es "vigente" si coincide con el prompt y modelo actuales;
+    si no, es "vieja": su afinidad se sigue usando hasta que se vuelva a
+    calcular, de a poco y empezando por las mas antiguas (`stale`).
+    """
+
+    def __init__(self, entries: dict | None = None) -> None:
+        self.entries: dict[str, dict] = entries or {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str | None) -> dict | None:
+        return self.entries.get(key) if key else None
+
+    def is_fresh(self, key: str | None, prompt_hash: str, model: str = GEMINI_MODEL) -> bool:
+        entry = self.get(key)
+        return entry is not None and entry.get("prompt") == prompt_hash and entry.get("model") == model
+
+    def put(self, key: str, score, prompt_hash: str | None, model: str | None = GEMINI_MODEL, scored_at: float | None = None) -> None:
+        self.entries[key] = {
+            "score": score,
+            "prompt": prompt_hash,
+            "model": model,
+            "scored_at": time.time() if scored_at is None else scored_at,
+        }
+
+    def seed(self, offers) -> int:
+        """
+        Afinidades que vienen del excel sin entrada en el cache: se guardan
+        sin prompt (viejas, las primeras en recalcularse). Retorna cuantas.
+        """
+        added = 0
+        for o in offers:
+            if o.affinity and o.description_hash and o.description_hash not in self.entries:
+                self.put(o.description_hash, o.affinity, None, None, scored_at=0)
+                added += 1
+        return added
+
+    def apply(self, offers) -> None:
+        """Toda oferta con una descripcion en el cache toma esa afinidad."""
+        for o in offers:
+            entry = self.get(o.description_hash)
+            if entry is not None:
+                o.affinity = entry["score"]
+
+    def stale(self, prompt_hash: str, model: str = GEMINI_MODEL, keys=None) -> list[str]:
+        """Hashes con afinidad de otro prompt/modelo (solo entre `keys` si se pasa), los mas antiguos primero."""
+        candidates = self.entries if keys is None else (k for k in keys if k in self.entries)
+        stale = [k for k in candidates if not self.is_fresh(k, prompt_hash, model)]
+        return sorted(stale, key=lambda k: self.entries[k].get("scored_at", 0))
+
+    def invalidate(self, prompt_hash: str | None = None, model: str | None = None) -> int:
+        """Borra las entradas de un prompt y/o modelo dado. Retorna cuantas."""
+        doomed = [
+            k for k, e in self.entries.items()
+            if (prompt_hash is None or e.get("prompt") == prompt_hash) and (model is None or e.get("model") == model)
+        ]
+        for k in doomed:
+            del self.entries[k]
+        return len(doomed)
+
+    @classmethod
+    def load(cls, path: str = AFFINITY_CACHE_PATH) -> "AffinityCache":
+        data = load_json(path, {})
+        return cls(data if isinstance(data, dict) else {})
+
+    def save(self, path: str = AFFINITY_CACHE_PATH) -> None:
+        save_json(path, self.entries)
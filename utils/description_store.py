@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import zlib
+
+from utils.get_computrabajo_description import clean_text
+
+# líneas que no aportan nada a la descripción (botones / enlaces de la página)
+_BOILERPLATE_LINES = frozenset({
+    "postularme",
+    "postular",
+    "ver más",
+    "ver menos",
+    "mostrar más",
+    "mostrar menos",
+    "show more",
+    "show less",
+    "see more",
+    "denunciar oferta",
+    "denunciar empleo",
+})
+
+_INVISIBLE_CHARS = dict.fromkeys(map(ord, "​‌‍⁠﻿"), None)
+
+
+def normalize_description(text: str) -> str:
+    """
+    Forma canónica de una descripción: `clean_text` + espacios colapsados por
+    línea, sin caracteres invisibles ni líneas de boilerplate. Dos copias del
+    mismo aviso (reposteado o en otra fuente) quedan iguales.
+    """
+    text = clean_text(text).replace("\xa0", " ").translate(_INVISIBLE_CHARS)
+    lines = []
+    for line in text.split("\n"):
+        line = " ".join(line.split())
+        if line.lower() in _BOILERPLATE_LINES:
+            continue
+        lines.append(line)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def description_hash(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+class DescriptionStore:
+    """
+    Descripciones normalizadas guardadas UNA vez, comprimidas (zlib) y
+    indexadas por hash de contenido. Las ofertas solo guardan el hash.
+    """
+
+    def __init__(self) -> None:
+        self._blobs: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._blobs
+
+    def put(self, text: str) -> str | None:
+        """Normaliza y guarda `text`; retorna su hash (None si queda vacía)."""
+        normalized = normalize_description(text)
+        if not normalized:
+            return None
+        key = description_hash(normalized)
+        if key not in self._blobs:
+            blob = zlib.compress(normalized.encode("utf-8"), 6)
+            with self._lock:
+                self._blobs.setdefault(key, blob)
+        return key
+
+    def get(self, key: str | None) -> str | None:
+        blob = self._blobs.get(key) if key else None
+        return zlib.decompress(blob).decode("utf-8") if blob is not None else None
+
+    def compressed_size(self) -> int:
+        return sum(len(b) for b in self._blobs.values())
+
+
+# store compartido por todas las ofertas del proceso
+descriptions = DescriptionStore()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import httpx
+
+from utils.MACROS import (
+    FAILURE_BLOCKED_RETRY,
+    FAILURE_LEDGER_PATH,
+    FAILURE_MAX_ATTEMPTS,
+    FAILURE_RETRY_BASE,
+    FAILURE_RETRY_MAX,
+)
+from utils.Offer import Offer
+from utils.job_sources import get_source, source_for_link
+from utils.json_store import load_json, save_json
+from utils.rate_limiter import THROTTLE_STATUSES
+from utils.scraper_errors import HttpStatusError, ScrapeError
+
+
+def _is_offer_failure(exc: Exception) -> bool:
+    """
+    Fallos atribuibles a la oferta, los únicos que cuentan como intento. Un
+    bloqueo (999/429/403), un error de configuración (cookies faltantes) o una
+    respuesta rara del servidor no dicen nada del link.
+    """
+    if isinstance(exc, HttpStatusError) and exc.status_code in THROTTLE_STATUSES:
+        return False
+    return isinstance(exc, (ScrapeError, httpx.TransportError))
+
+
+class FailureLedger:
+    """
+    Registro persistente de descargas de descripción fallidas, por offer id:
+    {id: {link, source, subject, reception_date, error, message, attempts,
+    permanent, next_retry}}.
+
+    - Fallo permanente (404/410, link que no es oferta, o más de
+      FAILURE_MAX_ATTEMPTS intentos): la oferta no se vuelve a intentar.
+    - Fallo transitorio: se reintenta recién después de `next_retry`, con
+      espera exponencial desde FAILURE_RETRY_BASE hasta FAILURE_RETRY_MAX.
+    - Fallo ajeno a la oferta (bloqueo 999/429/403, cookies faltantes, error
+      inesperado): no suma intentos ni la vuelve permanente; se reintenta tras
+      el Retry-After o FAILURE_BLOCKED_RETRY.
+
+    La oferta fallida no queda en el excel ni vuelve a llegar por correo
+    (el checkpoint IMAP ya avanzó): el ledger guarda lo necesario para
+    reconstruirla y `due_offers` la devuelve al pipeline cuando le toca.
+    """
+
+    def __init__(self, entries: dict[str, dict] | None = None) -> None:
+        self.entries: dict[str, dict] = entries or {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def skip_reason(self, offer_id: str, now: float | None = None) -> str | None:
+        """Motivo para no intentar la oferta ahora, o None si corresponde intentarla."""
+        entry = self.entries.get(offer_id)
+        if entry is None:
+            return None
+        if entry.get("permanent"):
+            return f"fallo permanente ({entry.get('error')})"
+        now = time.time() if now is None else now
+        if now < entry.get("next_retry", 0):
+            wait_h = (entry["next_retry"] - now) / 3600
+            return f"reintento en {wait_h:.1f} h ({entry.get('error')}, intento {entry.get('attempts')})"
+        return None
+
+    def record_failure(self, offer: Offer, exc: Exception) -> dict:
+        """
+        Registra cualquier fallo: la oferta ya no vuelve por correo, así que
+        lo que no quede en el ledger se pierde.
+        """
+        with self._lock:
+            entry = self.entries.get(offer.id) or {"link": offer.link, "attempts": 0}
+            entry["source"] = getattr(offer.type, "name", None)
+            entry["subject"] = offer.father_mail_subject
+            entry["reception_date"] = str(offer.reception_date)
+            entry["error"] = type(exc).__name__
+            entry["message"] = str(exc)[:200]
+            if _is_offer_failure(exc):
+                entry["attempts"] += 1
+                entry["permanent"] = bool(getattr(exc, "permanent", False)) or entry["attempts"] >= FAILURE_MAX_ATTEMPTS
+                delay = min(FAILURE_RETRY_MAX, FAILURE_RETRY_BASE * 2 ** (entry["attempts"] - 1))
+            else:
+                entry.setdefault("permanent", False)
+                retry_after = getattr(exc, "retry_after", None)
+                delay = min(FAILURE_RETRY_MAX, retry_after if retry_after is not None else FAILURE_BLOCKED_RETRY)
+            entry["next_retry"] = time.time() + delay
+            self.entries[offer.id] = entry
+            return entry
+
+    def record_success(self, offer_id: str) -> None:
+        with self._lock:
+            self.entries.pop(offer_id, None)
+
+    def due_offers(self, now: float | None = None) -> list[Offer]:
+        """
+        Reconstruye las ofertas con fallo transitorio cuyo reintento ya llegó,
+        para volver a buscar su descripción en esta corrida.
+        """
+        now = time.time() if now is None else now
+        offers: list[Offer] = []
+        for offer_id, entry in self.entries.items():
+            link = entry.get("link")
+            if entry.get("permanent") or not link or now < entry.get("next_retry", 0):
+                continue
+            # entradas viejas sin fuente: se deduce del link
+            source = get_source(entry.get("source") or "") or source_for_link(link)
+            if source is None:
+                continue
+            offer = Offer(link, entry.get("reception_date") or "desconocida", entry.get("subject") or "(reintento)", source)
+            if offer.id == offer_id:
+                offers.append(offer)
+        return offers
+
+    def permanent_links(self) -> list[str]:
+        return [e["link"] for e in self.entries.values() if e.get("permanent") and e.get("link")]
+
+    @classmethod
+    def load(cls, path: str = FAILURE_LEDGER_PATH) -> "FailureLedger":
+        state = load_json(path, {})
+        return cls(state if isinstance(state, dict) else {})
+
+    def save(self, path: str = FAILURE_LEDGER_PATH) -> None:
+        with self._lock:
+            save_json(path, self.entries)
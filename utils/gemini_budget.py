@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from utils.MACROS import GEMINI_RPD, GEMINI_RPM, GEMINI_USAGE_PATH
+from utils.json_store import load_json, save_json
+
+# la cuota diaria de Gemini se reinicia a medianoche hora del Pacífico
+_QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+
+
+def _quota_day() -> str:
+    return datetime.now(_QUOTA_TZ).date().isoformat()
+
+
+class GeminiBudget:
+    """
+    Presupuesto de requests a Gemini: `rpm` por minuto (ventana deslizante)
+    y `rpd` por día. El uso diario se persiste entre corridas.
+
+    Al agotarse el presupuesto por minuto, o si la API responde 429, se pausa
+    (await) hasta que haya cupo. Si se agota el diario, `acquire` retorna
+    False: lo pendiente queda para la próxima corrida.
+    """
+
+    def __init__(self, rpm: int = GEMINI_RPM, rpd: int = GEMINI_RPD, used_today: int = 0) -> None:
+        self.rpm = rpm
+        self.rpd = rpd
+        self.day = _quota_day()
+        self.used_today = used_today
+        self._recent: deque[float] = deque()
+        self._paused_until = 0.0
+
+    @property
+    def remaining_today(self) -> int:
+        return max(0, self.rpd - self.used_today)
+
+    async def acquire(self) -> bool:
+        while True:
+            if _quota_day() != self.day:
+                self.day, self.used_today = _quota_day(), 0
+            if self.used_today >= self.rpd:
+                return False
+
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= 60:
+                self._recent.popleft()
+            wait = self._paused_until - now
+            if len(self._recent) >= self.rpm:
+                wait = max(wait, 60 - (now - self._recent[0]))
+            if wait <= 0:
+                self._recent.append(now)
+                self.used_today += 1
+                return True
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """La API pidió esperar (429): nadie envía nada hasta que pase `seconds`."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    @classmethod
+    def load(cls, path: str = GEMINI_USAGE_PATH, rpm: int = GEMINI_RPM, rpd: int = GEMINI_RPD) -> "GeminiBudget":
+        state = load_json(path, {})
+        used = state.get("used", 0) if isinstance(state, dict) and state.get("day") == _quota_day() else 0
+        return cls(rpm=rpm, rpd=rpd, used_today=int(used))
+
+    def save(self, path: str = GEMINI_USAGE_PATH) -> None:
+        save_json(path, {"day": self.day, "used": self.used_today})
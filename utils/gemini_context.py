@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from google.genai import types
+
+from utils.MACROS import (
+    BASE_PROMPT,
+    GEMINI_CACHE_TTL,
+    GEMINI_CONTEXT_STATE_PATH,
+    GEMINI_CV_PATH,
+    GEMINI_MODEL,
+    GEMINI_PROMPT_MODE,
+)
+from utils.gemini_query import get_gemini_client
+from utils.json_store import load_json, save_json
+from utils.logging import error, success
+
+# los archivos subidos a Gemini viven 48h; se re-suben un poco antes
+_FILE_LIFETIME = 47 * 3600
+# no reutilizar un cache que vence en menos de esto
+_CACHE_MARGIN = 120
+
+# salida estructurada: [{"id": "...", "score": 1-10}, ...]
+AFFINITY_RESPONSE_SCHEMA = types.Schema(
+    type=types.Type.ARRAY,
+    items=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "id": types.Schema(type=types.Type.STRING),
+            "score": types.Schema(type=types.Type.INTEGER, minimum=1, maximum=10),
+        },
+        required=["id", "score"],
+    ),
+)
+_JSON_OUTPUT = {"response_mime_type": "application/json", "response_schema": AFFINITY_RESPONSE_SCHEMA}
+
+
+@dataclass
+class GeminiContext:
+    """
+    Cómo viajan las instrucciones fijas (BASE_PROMPT y el CV) en cada consulta:
+
+    - "inline": dentro del prompt, como siempre.
+    - "system": como system_instruction; el prompt solo lleva las descripciones.
+    - "cache":  en un cached content de Gemini con TTL; cada consulta solo
+      referencia el cache y manda las descripciones. Si el cache desaparece a
+      mitad de corrida se pasa a "system" (`use_system_instruction`).
+
+    En todos los modos la respuesta es JSON según AFFINITY_RESPONSE_SCHEMA.
+    """
+
+    mode: str
+    config: types.GenerateContentConfig
+    cv_part: types.Part | None = None
+
+    @property
+    def sends_instructions(self) -> bool:
+        """True si el prompt de cada batch debe incluir BASE_PROMPT."""
+        return self.mode == "inline"
+
+    def contents(self, prompt: str) -> list | str:
+        # en modo cache el CV ya está dentro del cache
+        if self.cv_part is not None and self.mode != "cache":
+            return [self.cv_part, prompt]
+        return prompt
+
+    def use_system_instruction(self) -> None:
+        """Deja de referenciar el cache: las consultas siguientes mandan las instrucciones como system_instruction."""
+        self.mode = "system"
+        self.config = _system_config()
+
+
+def _system_config() -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(system_instruction=BASE_PROMPT, **_JSON_OUTPUT)
+
+
+def is_cache_error(exc: Exception) -> bool:
+    """True si gemini rechazó la consulta porque el cached content no existe o ya venció."""
+    return getattr(exc, "code", None) in (400, 403, 404) and "cache" in str(exc).lower()
+
+
+def _file_sha1(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _upload_cv(client, path: str, state: dict) -> types.Part | None:
+    """Sube el CV una vez y lo reutiliza mientras el archivo no cambie ni venza."""
+    try:
+        digest = _file_sha1(path)
+    except OSError as e:
+        error(f"No se pudo leer el CV {path}: {e}")
+        return None
+
+    cv = state.get("cv") or {}
+    if cv.get("sha1") == digest and time.time() - cv.get("uploaded", 0) < _FILE_LIFETIME:
+        return types.Part.from_uri(file_uri=cv["uri"], mime_type=cv.get("mime_type"))
+
+    try:
+        uploaded = client.files.upload(file=path)
+    except Exception as e:
+        error(f"No se pudo subir el CV a gemini, se sigue sin el : {e}")
+        return None
+    state["cv"] = {
+        "name": uploaded.name,
+        "uri": uploaded.uri,
+        "mime_type": uploaded.mime_type,
+        "sha1": digest,
+        "uploaded": time.time(),
+    }
+    success(f"CV subido a gemini : {uploaded.name}")
+    return types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type)
+
+
+def _cached_content_name(client, cv_part: types.Part | None, state: dict, ttl: int) -> str:
+    """
+    Crea el cached content, o reutiliza el guardado si tiene el mismo contenido
+    y sigue vigente; en ese caso se le renueva el TTL para que dure la corrida.
+    """
+    key = hashlib.sha1(
+        "|".join((GEMINI_MODEL, BASE_PROMPT, (state.get("cv") or {}).get("sha1", "") if cv_part else "")).encode("utf-8")
+    ).hexdigest()
+
+    cache = state.get("cache") or {}
+    if cache.get("key") == key and cache.get("expire", 0) - time.time() > _CACHE_MARGIN:
+        try:
+            updated = client.caches.update(name=cache["name"], config=types.UpdateCachedContentConfig(ttl=f"{ttl}s"))
+            cache["expire"] = updated.expire_time.timestamp() if updated.expire_time else time.time() + ttl
+            return cache["name"]
+        except Exception:
+            pass  # borrado o vencido del lado de Gemini: se crea otro
+
+    created = client.caches.create(
+        model=GEMINI_MODEL,
+        config=types.CreateCachedContentConfig(
+            display_name="offer-affinity-instructions",
+            system_instruction=BASE_PROMPT,
+            contents=[types.Content(role="user", parts=[cv_part])] if cv_part else None,
+            ttl=f"{ttl}s",
+        ),
+    )
+    expire = created.expire_time.timestamp() if created.expire_time else time.time() + ttl
+    state["cache"] = {"name": created.name, "key": key, "expire": expire}
+    success(f"Cache de gemini creado : {created.name} (vence {datetime.fromtimestamp(expire, timezone.utc):%H:%M} UTC)")
+    return created.name
+
+
+def prepare_gemini_context(
+    mode: str = GEMINI_PROMPT_MODE,
+    cv_path: str | None = GEMINI_CV_PATH,
+    ttl: int = GEMINI_CACHE_TTL,
+    path: str = GEMINI_CONTEXT_STATE_PATH,
+) -> GeminiContext:
+    """
+    Prepara UNA vez por corrida cómo se mandan las instrucciones fijas.
+    El nombre del cache y del CV subido se persisten para reutilizarlos entre
+    corridas mientras sigan vigentes. Si el cache no se puede crear (p.ej. el
+    prompt no llega al mínimo de tokens) se cae a "system".
+    """
+    if mode not in ("inline", "system", "cache"):
+        raise ValueError(f"GEMINI_PROMPT_MODE invalido: {mode!r} (usa 'inline', 'system' o 'cache')")
+
+    client = get_gemini_client()
+    state = load_json(path, {})
+    if not isinstance(state, dict):
+        state = {}
+
+    try:
+        cv_part = _upload_cv(client, cv_path, state) if cv_path else None
+
+        if mode == "cache":
+            try:
+                name = _cached_content_name(client, cv_part, state, ttl)
+                return GeminiContext("cache", types.GenerateContentConfig(cached_content=name, **_JSON_OUTPUT), cv_part)
+            except Exception as e:
+                error(f"No se pudo usar el cache de gemini, se usa system_instruction : {e}")
+                mode = "system"
+
+        if mode == "system":
+            return GeminiContext("system", _system_config(), cv_part)
+        return GeminiContext("inline", types.GenerateContentConfig(**_JSON_OUTPUT), cv_part)
+    finally:
+        save_json(path, state)
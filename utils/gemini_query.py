@@ -1,16 +1,45 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
 from dotenv import load_dotenv
 from google import genai
 import os
 
+from utils.MACROS import GEMINI_MODEL
 
+if TYPE_CHECKING:
+    from utils.gemini_context import GeminiContext
 
-def gemini_query(prompt): 
+
+@lru_cache(maxsize=1)
+def get_gemini_client() -> genai.Client:
+    """Cliente unico por proceso: el .env se lee y el cliente se crea una sola vez."""
     load_dotenv()
     key = os.getenv("GEMINI_API_KEY")
-    client = genai.Client(api_key=key)
+    return genai.Client(api_key=key)
+
+
+def gemini_query(prompt, context: GeminiContext | None = None):
+    client = get_gemini_client()
     response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=prompt,
+        model=GEMINI_MODEL,
+        contents=context.contents(prompt) if context else prompt,
+        config=context.config if context else None,
     )
     return response.text
 
+
+async def gemini_query_async(prompt, context: GeminiContext | None = None):
+    """
+    Igual que gemini_query pero con el cliente async: varios batches pueden estar en vuelo a la vez.
+    Con `context` (utils.gemini_context) las instrucciones fijas no viajan en `prompt`.
+    """
+    client = get_gemini_client()
+    response = await client.aio.models.generate_content(
+        model=GEMINI_MODEL,
+        contents=context.contents(prompt) if context else prompt,
+        config=context.config if context else None,
+    )
+    return response.text
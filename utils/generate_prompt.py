@@ -1,5 +1,22 @@
 from utils.MACROS import BASE_PROMPT
 
-def generate_prompt(offers):
-    descrptions_section = "\n".join([f"\n\n###OFFER_ID  : {o.id}\n\nDESCRIPTION: {o.description}" for o in offers])
-    return BASE_PROMPT+descrptions_section
+def truncate_description(text, max_chars):
+    """Recorta `text` a `max_chars` sin partir palabras (prefiere cortar en un salto de linea)."""
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = text.rfind(" ", 0, max_chars)
+    if cut <= 0:
+        cut = max_chars
+    return text[:cut].rstrip() + " [...]"
+
+def offer_section(o, max_chars=None):
+    return f"\n\n###OFFER_ID  : {o.id}\n\nDESCRIPTION: {truncate_description(o.description or '', max_chars)}"
+
+def generate_descriptions_prompt(offers, max_chars=None):
+    """Solo la sección de ofertas: para cuando las instrucciones ya viajan en el contexto de gemini."""
+    return "\n".join([offer_section(o, max_chars) for o in offers])
+
+def generate_prompt(offers, max_chars=None):
+    return BASE_PROMPT+generate_descriptions_prompt(offers, max_chars)
@@ -1,19 +1,32 @@
 # utils/get_computrabajo_description.py
 from __future__ import annotations
 
+import importlib.util
 import re
 import json
+import threading
+from collections import Counter
+from typing import Callable
 from html import unescape
 from urllib.parse import urlparse, parse_qs, unquote
 
-import requests
+import httpx
 from bs4 import BeautifulSoup
 
-
-_UA = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+from utils.MACROS import HTTP_MAX_PAGE_BYTES, HTTP_PAGE_CONTENT_TYPES
+from utils.http_cache import (
+    StopCondition,
+    cached_get,
+    check_content,
+    detached_response,
+    is_truncated,
+    read_capped,
+    store_response,
 )
+from utils.html_text import html_to_text
+from utils.http_sessions import get_http_client
+from utils.redirect_cache import lookup_redirect, remember_redirect
+from utils.scraper_errors import DescriptionParseError, HttpStatusError, NotAnOfferError, parse_retry_after
 
 
 # ======================================================
@@ -71,44 +84,140 @@ def _is_computrabajo_job_url(url: str) -> bool:
         return False
 
 
-def _safe_get(url: str, timeout: int) -> requests.Response:
-    return requests.get(
+# donde corta slice_description; solo cuentan después de "Descripción de la oferta"
+# (la "ó" puede venir en UTF-8 o como entidad: &oacute; / &#243; / &#xF3;)
+_SLICE_MARKERS = (b"Aptitudes asociadas a esta oferta", b"Postularme")
+_DESCRIPTION_ANCHOR_RE = re.compile(rb"Descripci(?:\xc3\xb3|&oacute;|&#0*243;|&#[xX]0*[fF]3;)n de la oferta")
+_MARKER_OVERLAP = 64
+
+
+def _job_page_stop_condition() -> StopCondition:
+    """
+    Indica cuándo dejar de bajar una página de oferta:
+    - cerró un <script> JSON-LD y el JobPosting leído hasta ahí ya da una
+      descripción usable (el camino rápido no mira el resto del documento), o
+    - apareció, después de "Descripción de la oferta", el marcador donde
+      corta slice_description.
+    """
+    state = {"jobposting": False, "anchor": -1}
+
+    def stop_when(body: bytearray, start: int) -> bool:
+        lo = max(0, start - _MARKER_OVERLAP)
+
+        if not state["jobposting"]:
+            state["jobposting"] = body.find(b"JobPosting", lo) != -1
+        if state["jobposting"] and (body.find(b"</script", lo) != -1 or body.find(b"</SCRIPT", lo) != -1):
+            if _description_from_jsonld(bytes(body).decode("utf-8", "replace")):
+                return True
+
+        if state["anchor"] == -1:
+            m = _DESCRIPTION_ANCHOR_RE.search(body, lo)
+            state["anchor"] = m.start() if m else -1
+        if state["anchor"] != -1:
+            since = max(lo, state["anchor"])
+            return any(body.find(marker, since) != -1 for marker in _SLICE_MARKERS)
+        return False
+
+    return stop_when
+
+
+def _safe_get(
+    url: str,
+    timeout: int,
+    client: httpx.Client | None = None,
+    use_cache: bool = True,
+    throttle: Callable[[], None] | None = None,
+    full: bool = False,
+) -> httpx.Response:
+    """
+    GET de una página de oferta sobre el cliente compartido (keep-alive, sigue
+    redirects) pasando por el cache HTTP. Se baja en streaming con tope de
+    HTTP_MAX_PAGE_BYTES y se corta en cuanto llegó lo que usa la extracción.
+
+    `full=True` vuelve a bajar la página sin cortarla antes (solo el tope de
+    bytes) y reemplaza lo que hubiera en el cache.
+    """
+    client = client or get_http_client("COMPUTRABAJO")
+    return cached_get(
+        client,
         url,
         timeout=timeout,
-        allow_redirects=True,
-        headers={
-            "User-Agent": _UA,
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache",
-        },
+        use_cache=use_cache,
+        throttle=throttle,
+        max_bytes=HTTP_MAX_PAGE_BYTES,
+        stop_when=None if full else _job_page_stop_condition(),
+        content_types=HTTP_PAGE_CONTENT_TYPES,
+        refresh=full,
     )
 
 
-def _resolve_to_job_url(url: str, timeout: int = 20) -> str:
+def _follow_redirects(
+    url: str,
+    timeout: int,
+    client: httpx.Client | None = None,
+    use_cache: bool = True,
+    throttle: Callable[[], None] | None = None,
+) -> tuple[str, str | None]:
+    """
+    Sigue los redirects con un GET en streaming, sin bajar los bodies
+    intermedios. Si termina en una oferta el body solo se lee para dejarlo
+    en el cache HTTP (así la descarga de la descripción no repite el request);
+    si cae en un listado se lee el HTML para buscar el link.
+
+    Retorna (url_final, html del listado o None).
+    """
+    client = client or get_http_client("COMPUTRABAJO")
+    if throttle:
+        throttle()
+    with client.stream("GET", url, timeout=timeout, follow_redirects=True) as resp:
+        final_url = str(resp.url)
+        if _is_computrabajo_job_url(final_url):
+            if use_cache and resp.status_code == 200:
+                check_content(resp, HTTP_MAX_PAGE_BYTES, HTTP_PAGE_CONTENT_TYPES)
+                body, truncated = read_capped(resp, HTTP_MAX_PAGE_BYTES, _job_page_stop_condition())
+                store_response(final_url, detached_response(resp, body, truncated))
+            return final_url, None
+        check_content(resp, HTTP_MAX_PAGE_BYTES, HTTP_PAGE_CONTENT_TYPES)
+        body, _ = read_capped(resp, HTTP_MAX_PAGE_BYTES)
+        return final_url, body.decode(resp.encoding or "utf-8", "replace")
+
+
+def _resolve_to_job_url(
+    url: str,
+    timeout: int = 20,
+    client: httpx.Client | None = None,
+    use_cache: bool = True,
+    throttle: Callable[[], None] | None = None,
+) -> str:
     """
     - Si llega una URL de tracking (go.computrabajo.com) o wrapper con ?url=,
       intenta llegar a la URL real de la oferta.
     - Si termina en un listado, intenta sacar el primer link de oferta del HTML.
+
+    Las resoluciones a una oferta se guardan (utils.redirect_cache): en
+    corridas siguientes el mismo link de tracking no hace ningún request.
     """
     url = _unwrap_tracking(url)
 
     if _is_computrabajo_job_url(url):
         return url
 
+    known = lookup_redirect(url)
+    if known:
+        return known
+
     host = (urlparse(url).netloc or "").lower()
 
     # Tracking de Computrabajo
     if "go.computrabajo.com" in host:
-        resp = _safe_get(url, timeout=timeout)
-        final_url = str(resp.url)
+        final_url, html = _follow_redirects(url, timeout, client=client, use_cache=use_cache, throttle=throttle)
 
         if _is_computrabajo_job_url(final_url):
+            remember_redirect(url, final_url)
             return final_url
 
         # Si cayó en listado, buscar primer link de oferta
-        soup = BeautifulSoup(resp.text or "", "html.parser")
+        soup = BeautifulSoup(html or "", "html.parser")
         a = soup.select_one('a[href*="oferta-de-trabajo"]')
         if a:
             href = (a.get("href") or "").strip()
@@ -124,69 +233,87 @@ def _resolve_to_job_url(url: str, timeout: int = 20) -> str:
 
     # Último intento: seguir redirects generales
     try:
-        resp = _safe_get(url, timeout=timeout)
-        if _is_computrabajo_job_url(str(resp.url)):
-            return str(resp.url)
-        return str(resp.url)
+        final_url, _ = _follow_redirects(url, timeout, client=client, use_cache=use_cache, throttle=throttle)
+        if _is_computrabajo_job_url(final_url):
+            remember_redirect(url, final_url)
+        return final_url
     except Exception:
         return url
 
 
-def _extract_description_from_job_html(html: str) -> str:
+# <script type="application/ld+json">...</script> sin construir el DOM
+_JSONLD_SCRIPT_RE = re.compile(
+    r"<script\b([^>]*)>(.*?)</script\s*>",
+    flags=re.IGNORECASE | re.DOTALL,
+)
+_JSONLD_TYPE_RE = re.compile(r"application/ld\+json", re.IGNORECASE)
+
+# Selectores comunes (cambian por país/plantilla; ponemos varios)
+_DESCRIPTION_SELECTORS = (
+    "#jobDescriptionText",
+    ".box_detail .box_detail_text",
+    ".box_detail .text",
+    ".box_detail",
+    ".detalle_oferta",
+    ".detalle",
+    "section#detail",
+    "div#detail",
+    "article",
+    "main",
+)
+
+# un solo parseo de respaldo, con lxml si está instalado
+_FALLBACK_PARSER = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+# estrategia que resolvió cada página: {url: "jsonld" | "selector" | "heading" | "none"}
+_strategy_lock = threading.Lock()
+extraction_strategies: dict[str, str] = {}
+
+
+def _description_from_jsonld(html: str) -> str:
     """
-    Extrae descripción de la página de oferta.
-    Estrategias:
-      1) JSON-LD JobPosting (description)
-      2) Selectores frecuentes de contenedores
-      3) Heurística por sección "Descripción"
+    Camino rápido: busca el JobPosting en los bloques JSON-LD con una regex
+    sobre el HTML crudo y pasa su descripción (HTML) a texto sin bs4.
     """
-    soup = BeautifulSoup(html or "", "html.parser")
-
-    # 1) JSON-LD (schema.org JobPosting)
-    for s in soup.find_all("script", attrs={"type": re.compile(r"application/ld\+json", re.I)}):
+    if "ld+json" not in html:
+        return ""
+    for m in _JSONLD_SCRIPT_RE.finditer(html):
+        if not _JSONLD_TYPE_RE.search(m.group(1)):
+            continue
+        raw = m.group(2).strip()
+        if not raw or "JobPosting" not in raw:
+            continue
         try:
-            raw = (s.string or s.get_text() or "").strip()
-            if not raw:
-                continue
             data = json.loads(raw)
-            objs = data if isinstance(data, list) else [data]
-            for obj in objs:
-                if not isinstance(obj, dict):
-                    continue
-                if obj.get("@type") == "JobPosting" and isinstance(obj.get("description"), str):
-                    # puede traer HTML dentro
-                    desc_html = obj["description"]
-                    desc_text = BeautifulSoup(desc_html, "html.parser").get_text("\n")
-                    desc_text = clean_text(desc_text)
-                    if len(desc_text) >= 120:
-                        return desc_text
-        except Exception:
-            pass
-
-    # 2) Selectores comunes (cambian por país/plantilla; ponemos varios)
-    selectors = [
-        "#jobDescriptionText",
-        ".box_detail .box_detail_text",
-        ".box_detail .text",
-        ".box_detail",
-        ".detalle_oferta",
-        ".detalle",
-        "section#detail",
-        "div#detail",
-        "article",
-        "main",
-    ]
+        except ValueError:
+            continue
+        objs = data if isinstance(data, list) else [data]
+        for obj in objs:
+            if not isinstance(obj, dict):
+                continue
+            if obj.get("@type") == "JobPosting" and isinstance(obj.get("description"), str):
+                # puede traer HTML dentro
+                desc_text = clean_text(html_to_text(obj["description"], "\n"))
+                if len(desc_text) >= 120:
+                    return desc_text
+    return ""
+
+
+def _description_from_dom(html: str) -> tuple[str, str]:
+    """Respaldo: un único parseo del documento para selectores y heurística."""
+    soup = BeautifulSoup(html, _FALLBACK_PARSER)
 
     best = ""
-    for sel in selectors:
+    for sel in _DESCRIPTION_SELECTORS:
         el = soup.select_one(sel)
         if not el:
             continue
         txt = clean_text(el.get_text("\n"))
         if len(txt) > len(best):
             best = txt
+    strategy = "selector" if best else "none"
 
-    # 3) Heurística: recortar desde “Descripción”
+    # Heurística: recortar desde “Descripción”
     if not best or len(best) < 120:
         whole = clean_text(soup.get_text("\n"))
         m = re.search(r"\bDescripci[oó]n\b[:\s]*\n(.+)", whole, flags=re.IGNORECASE | re.DOTALL)
@@ -203,8 +330,36 @@ def _extract_description_from_job_html(html: str) -> str:
             candidate = clean_text(candidate)
             if len(candidate) > len(best):
                 best = candidate
+                strategy = "heading"
+
+    return best, strategy
+
+
+def _extract_description_from_job_html(html: str) -> tuple[str, str]:
+    """
+    Extrae descripción de la página de oferta.
+    Estrategias (en orden; se retorna también cuál ganó):
+      1) "jsonld":   JSON-LD JobPosting por regex, sin DOM
+      2) "selector": selectores frecuentes de contenedores
+      3) "heading":  heurística por sección "Descripción"
+    2 y 3 comparten un único parseo del documento.
+    """
+    html = html or ""
+    desc = _description_from_jsonld(html)
+    if desc:
+        return desc, "jsonld"
+    return _description_from_dom(html)
+
+
+def record_extraction_strategy(url: str, strategy: str) -> None:
+    with _strategy_lock:
+        extraction_strategies[url] = strategy
+
+
+def extraction_strategy_counts() -> dict[str, int]:
+    with _strategy_lock:
+        return dict(Counter(extraction_strategies.values()))
 
-    return best
 
 def slice_description(desc, job_url):
     """
@@ -219,7 +374,7 @@ def slice_description(desc, job_url):
     if idx != -1:
         desc = desc[idx:]
     else:
-        raise RuntimeError(f"No se logro encontrar **Descripción de la oferta** dentro de la descripcion de {job_url[:20]}")
+        raise DescriptionParseError(f"No se logro encontrar **Descripción de la oferta** dentro de la descripcion de {job_url[:20]}")
 
 
     idx = desc.find("Aptitudes asociadas a esta oferta")
@@ -230,18 +385,46 @@ def slice_description(desc, job_url):
         if idx != -1:
             desc = desc[:idx]
         else:
-            raise RuntimeError("No se logro encontrar **Postularme** dentro de la descripcion de {job_url[:20]}")
+            raise DescriptionParseError(f"No se logro encontrar **Postularme** dentro de la descripcion de {job_url[:20]}")
 
     return desc
 
 
 
 
+def _description_from_response(resp: httpx.Response, resolved: str, job_url: str) -> str:
+    """Valida el status de la página de la oferta y extrae y recorta su descripción."""
+    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+
+    if resp.status_code == 403:
+        raise HttpStatusError("❌ 403 Forbidden al acceder a Computrabajo (posible bloqueo).", 403, retry_after)
+    if resp.status_code == 404:
+        raise HttpStatusError("❌ 404 Not Found (oferta eliminada o link inválido).", 404)
+    if resp.status_code == 429:
+        raise HttpStatusError("❌ 429 Too Many Requests desde Computrabajo.", 429, retry_after)
+    if resp.status_code != 200:
+        raise HttpStatusError(f"❌ HTTP {resp.status_code} al acceder a Computrabajo.", resp.status_code, retry_after)
+
+    desc, strategy = _extract_description_from_job_html(resp.text or "")
+    record_extraction_strategy(resolved, strategy)
+
+    if not desc or len(desc) < 120:
+        raise DescriptionParseError("❌ No se pudo extraer una descripción válida desde Computrabajo.")
+
+    return slice_description(desc, job_url)
+
+
 # ======================================================
 # FUNCIÓN PRINCIPAL
 # ======================================================
 
-def get_computrabajo_description(job_url: str, timeout: int = 20) -> str:
+def get_computrabajo_description(
+    job_url: str,
+    timeout: int = 20,
+    client: httpx.Client | None = None,
+    use_cache: bool = True,
+    throttle: Callable[[], None] | None = None,
+) -> str:
     """
     Devuelve la descripción de una oferta de Computrabajo a partir del link.
 
@@ -250,28 +433,31 @@ def get_computrabajo_description(job_url: str, timeout: int = 20) -> str:
       - URL de tracking go.computrabajo.com
       - URL wrapper con ?url=...
 
-    Lanza RuntimeError si no obtiene una descripción válida.
+    `client` permite inyectar otro httpx.Client (por defecto el compartido).
+    `use_cache=False` salta el cache HTTP en disco; `throttle` se llama antes
+    de cada request real (p.ej. el rate limiter de la fuente).
+
+    Si la descripción no sale de una página cortada antes de terminar (ver
+    `_job_page_stop_condition`), la página se vuelve a bajar completa una vez.
+
+    Lanza NotAnOfferError si el link no es una oferta, HttpStatusError ante
+    errores HTTP y DescriptionParseError si no obtiene una descripción válida.
     """
-    resolved = _resolve_to_job_url(job_url, timeout=timeout)
+    resolved = _resolve_to_job_url(job_url, timeout=timeout, client=client, use_cache=use_cache, throttle=throttle)
 
     if not _is_computrabajo_job_url(resolved):
-        raise RuntimeError(
+        raise NotAnOfferError(
             "❌ La URL no parece ser una oferta directa de Computrabajo "
             f"(resuelta a: {resolved})."
         )
 
-    resp = _safe_get(resolved, timeout=timeout)
-
-    if resp.status_code == 403:
-        raise RuntimeError("❌ 403 Forbidden al acceder a Computrabajo (posible bloqueo).")
-    if resp.status_code == 404:
-        raise RuntimeError("❌ 404 Not Found (oferta eliminada o link inválido).")
-    if resp.status_code != 200:
-        raise RuntimeError(f"❌ HTTP {resp.status_code} al acceder a Computrabajo.")
-
-    desc = _extract_description_from_job_html(resp.text or "")
-
-    if not desc or len(desc) < 120:
-        raise RuntimeError("❌ No se pudo extraer una descripción válida desde Computrabajo.")
-
-    return slice_description(desc, job_url)
+    resp = _safe_get(resolved, timeout=timeout, client=client, use_cache=use_cache, throttle=throttle)
+    try:
+        return _description_from_response(resp, resolved, job_url)
+    except DescriptionParseError:
+        # la página se cortó antes de terminar (marcador engañoso o tope de bytes,
+        # recién bajada o servida desde el cache): se baja completa una vez más
+        if not is_truncated(resp):
+            raise
+    resp = _safe_get(resolved, timeout=timeout, client=client, use_cache=use_cache, throttle=throttle, full=True)
+    return _description_from_response(resp, resolved, job_url)
@@ -5,17 +5,42 @@ import re
 import ssl
 import socket
 import imaplib
+import queue
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterator
 from utils.logging import success,error
 import email
 from email.header import decode_header
 from email.utils import parsedate_to_datetime
-from urllib.parse import urlparse, parse_qs, unquote, urlunparse
+from datetime import date, datetime, timedelta, timezone
 from dotenv import load_dotenv
 
-from bs4 import BeautifulSoup
-
 from utils.Offer import Offer
-from utils.OfferTypeEnum import OfferTypeEnum
+from utils.MACROS import (
+    IMAP_FETCH_CHUNK_SIZE,
+    IMAP_MAX_CONNECTIONS,
+    IMAP_MAX_PART_BYTES,
+    LINK_CACHE_SIZE,
+    PARSE_QUEUE_SIZE,
+    RAW_FETCH_MAX_BYTES,
+)
+from utils.link_cache import link_cache_key, load_link_cache, save_link_cache
+from utils.imap_bodystructure import (
+    TextPart,
+    build_minimal_message,
+    extract_bodystructure,
+    join_fetch_literals,
+    select_text_parts,
+)
+from utils.imap_pool import ImapConnectionPool
+from utils.job_sources import JobSource, canonicalize_job_url, get_source, job_host_markers, job_senders
+from utils.seen_offer_index import SeenOfferIndex
+from utils.raw_email_cache import RawEmailCache, iter_cached_emails, read_cached_email
+from utils.html_link_extractor import extract_anchor_pairs, has_job_hosts
+from utils.imap_checkpoint import PendingCheckpoint, advance_checkpoint, load_imap_checkpoint
 
 # evita bloqueos infinitos
 socket.setdefaulttimeout(35)
@@ -110,13 +135,6 @@ _CTA_TEXT_RE = re.compile(
     re.IGNORECASE,
 )
 
-# paths típicos que NO son ofertas (evitar basura)
-_CT_BAD_PATH_RE = re.compile(
-    r"(unsubscribe|unsub|baja|cancel|privacidad|privacy|terminos|terms|ayuda|help|faq|soporte|support)",
-    re.IGNORECASE,
-)
-
-
 def _extract_urls_from_text(text: str) -> list[str]:
     urls = _URL_RE.findall(text or "")
     seen, out = set(), []
@@ -135,19 +153,10 @@ def _extract_links_from_html_with_text(html: str) -> list[tuple[str, str]]:
     """
     if not html:
         return []
-    soup = BeautifulSoup(html, "html.parser")
-
-    pairs: list[tuple[str, str]] = []
-    for a in soup.find_all("a", href=True):
-        href = (a.get("href") or "").strip()
-        if not href:
-            continue
-
-        # algunos emails pueden tener href relativo: lo dejamos pasar para intentar arreglarlo luego
-        anchor_text = " ".join(a.get_text(" ", strip=True).split())
-        pairs.append((href, anchor_text))
-
-    return pairs
+    # parser por eventos (sin árbol DOM): mismo resultado que BeautifulSoup
+    # + find_all("a", href=True), varias veces más rápido.
+    # algunos emails pueden tener href relativo: lo dejamos pasar para intentar arreglarlo luego
+    return extract_anchor_pairs(html)
 
 
 def _extract_urls_from_html(html: str) -> list[str]:
@@ -167,120 +176,80 @@ def _extract_urls_from_html(html: str) -> list[str]:
     return out
 
 
-def _unwrap_tracking(url: str) -> str:
-    try:
-        parsed = urlparse(url)
-        qs = parse_qs(parsed.query)
-
-        # tracking por query param
-        for key in ("url", "redirect", "u", "target", "dest", "destination"):
-            if key in qs and qs[key]:
-                candidate = unquote(qs[key][0])
-                if candidate.startswith("http://") or candidate.startswith("https://"):
-                    return candidate
-
-        # a veces viene en el fragment (#)
-        if parsed.fragment:
-            frag = parsed.fragment
-            # ejemplo: #url=https%3A%2F%2F...
-            m = re.search(r"(?:^|&|#)url=([^&]+)", frag, flags=re.IGNORECASE)
-            if m:
-                candidate = unquote(m.group(1))
-                if candidate.startswith("http://") or candidate.startswith("https://"):
-                    return candidate
-
-    except Exception:
-        pass
-    return url
-
-
 # ----------------------------
 # Helpers: canonical job links
 # ----------------------------
 
-def _canonical_linkedin_job_url(url: str) -> str | None:
-    try:
-        u = _unwrap_tracking(url)
-        p = urlparse(u)
-        host = (p.netloc or "").lower()
-
-        if host.endswith("lnkd.in"):
-            return None
-        if "linkedin.com" not in host:
-            return None
-
-        path = p.path or ""
-        q = parse_qs(p.query)
-
-        m = re.search(r"/jobs/view/(\d+)", path)
-        if m:
-            job_id = m.group(1)
-            return f"https://www.linkedin.com/jobs/view/{job_id}/"
-
-        for key in ("currentjobid", "jobid", "currentJobId", "jobId"):
-            if key in q and q[key]:
-                job_id = q[key][0]
-                if job_id.isdigit():
-                    return f"https://www.linkedin.com/jobs/view/{job_id}/"
-
-        return None
-    except Exception:
-        return None
-
+# ----------------------------
+# Memo de canonicalización
+# ----------------------------
 
-def _canonical_computrabajo_url(url: str, is_cta: bool = False) -> str | None:
+# Subir este número cada vez que cambie la lógica de los canonicalizadores:
+# invalida el cache persistente de links.
+LINK_CACHE_VERSION = 1
+
+# mapeo persistente {clave: [canon, tipo]} con el que se siembra la corrida
+_persistent_links: dict[str, list] = {}
+# entradas calculadas en esta corrida (se persisten al final)
+_new_links: dict[str, list] = {}
+_link_stats: Counter = Counter()
+
+
+@lru_cache(maxsize=LINK_CACHE_SIZE)
+def _canonical_job_url_lru(url: str, is_cta: bool) -> tuple[str | None, JobSource | None]:
+    # solo se llega aquí en un miss del LRU
+    key = link_cache_key(url, is_cta)
+    entry = _persistent_links.get(key)
+    if entry is not None:
+        canon, typ_name = entry
+        source = get_source(typ_name) if typ_name else None
+        # una fuente que ya no está registrada se recalcula
+        if typ_name is None or source is not None:
+            _link_stats["persistent_hits"] += 1
+            return canon, source
+
+    _link_stats["computed"] += 1
+    canon, typ = canonicalize_job_url(url, is_cta=is_cta)
+    _new_links[key] = [canon, typ.name if typ else None]
+    return canon, typ
+
+
+def _canonical_job_url_memo(url: str, is_cta: bool = False) -> tuple[str | None, JobSource | None]:
     """
-    Computrabajo: hay correos con link directo de oferta (oferta-de-trabajo),
-    y otros donde el CTA es "Revisa la selección" y lleva a una página de selección/campaña.
-
-    Regla:
-    - Si es link computrabajo, lo aceptamos si NO es "basura" (unsubscribe/privacy/etc.)
-    - Si además coincide patrón "oferta", perfecto.
-    - Si NO coincide patrón oferta, solo lo aceptamos si viene del CTA (is_cta=True).
+    `canonicalize_job_url` (utils.job_sources) con memo: LRU acotado (url, is_cta) por proceso,
+    sembrado con el mapeo persistente de corridas anteriores.
     """
-    try:
-        u = _unwrap_tracking(url)
-        p = urlparse(u)
-        host = (p.netloc or "").lower()
-
-        if "computrabajo" not in host:
-            return None
-
-        path = (p.path or "").lower()
-
-        # filtrar basura
-        if _CT_BAD_PATH_RE.search(path):
-            return None
+    _link_stats["lookups"] += 1
+    return _canonical_job_url_lru(url, bool(is_cta))
 
-        # patrón fuerte (oferta directa)
-        is_offer_like = (
-            ("/ofertas-de-trabajo/" in path and "oferta-de-trabajo" in path)
-            or ("/oferta" in path)
-            or ("oferta-de-trabajo" in path)
-        )
-
-        # si no parece oferta directa, solo aceptar si viene del CTA
-        if not is_offer_like and not is_cta:
-            return None
-
-        # canonical: quitar query/fragment (utm, tracking, etc.)
-        canon = urlunparse((p.scheme or "https", p.netloc, p.path, "", "", ""))
-        return canon
 
-    except Exception:
-        return None
+def _seed_link_cache(links: dict[str, list]) -> None:
+    _persistent_links.clear()
+    _persistent_links.update(links)
+    _new_links.clear()
+    _link_stats.clear()
+    _canonical_job_url_lru.cache_clear()
 
 
-def _canonical_job_url(url: str, is_cta: bool = False) -> tuple[str | None, OfferTypeEnum | None]:
-    canon = _canonical_linkedin_job_url(url)
-    if canon:
-        return canon, OfferTypeEnum.LINKEDIN
+def _drain_link_cache() -> tuple[dict[str, list], Counter]:
+    """Retorna (y resetea) las entradas nuevas y los contadores acumulados."""
+    new_links, stats = dict(_new_links), Counter(_link_stats)
+    _new_links.clear()
+    _link_stats.clear()
+    return new_links, stats
 
-    canon = _canonical_computrabajo_url(url, is_cta=is_cta)
-    if canon:
-        return canon, OfferTypeEnum.COMPUTRABAJO
 
-    return None, None
+def _report_link_cache(stats: Counter) -> None:
+    lookups = stats["lookups"]
+    if not lookups:
+        return
+    lru_hits = lookups - stats["persistent_hits"] - stats["computed"]
+    saved = (lookups - stats["computed"]) / lookups
+    print(
+        f"Cache de links: {lookups} consultas | {lru_hits} hits LRU | "
+        f"{stats['persistent_hits']} hits persistentes | {stats['computed']} calculados "
+        f"({saved:.0%} ahorrado)"
+    )
 
 
 def _dedupe_keep_order(items: list[str]) -> list[str]:
@@ -306,7 +275,8 @@ def _dedupe_keep_order_bytes(items: list[bytes]) -> list[bytes]:
 # ----------------------------
 
 def _safe_search(mail: imaplib.IMAP4_SSL, criteria: list[str]) -> list[bytes]:
-    status, data = mail.search(None, *criteria)
+    """UID SEARCH: retorna UIDs (estables entre sesiones), no numeros de secuencia."""
+    status, data = mail.uid("SEARCH", *criteria)
     if status != "OK":
         raise RuntimeError(f"IMAP search failed: {status} {data}")
     if not data or not data[0]:
@@ -314,10 +284,64 @@ def _safe_search(mail: imaplib.IMAP4_SSL, criteria: list[str]) -> list[bytes]:
     return data[0].split()
 
 
+_IMAP_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def _imap_date(d: date) -> str:
+    """Fecha en formato IMAP (dd-Mon-yyyy), sin depender del locale."""
+    return f"{d.day:02d}-{_IMAP_MONTHS[d.month - 1]}-{d.year}"
+
+
+def _build_window_criteria(
+    mail: imaplib.IMAP4_SSL,
+    sources: tuple[str, ...],
+    days: int,
+    last_uid: int = 0,
+    unseen_only: bool = False,
+) -> list[str]:
+    """
+    Una sola búsqueda para TODOS los remitentes dentro de la ventana de `days` días.
+
+    - Gmail (X-GM-EXT-1): X-GM-RAW "from:(a OR b) newer_than:Nd"
+    - IMAP estándar:      OR FROM "a" FROM "b" SINCE dd-Mon-yyyy
+    """
+    criteria: list[str] = []
+    if last_uid:
+        criteria += ["UID", f"{last_uid + 1}:*"]
+    if unseen_only:
+        criteria.append("UNSEEN")
+
+    if "X-GM-EXT-1" in (getattr(mail, "capabilities", None) or ()):
+        senders = " OR ".join(sources)
+        criteria += ["X-GM-RAW", f'"from:({senders}) newer_than:{days}d"']
+        return criteria
+
+    criteria += ["OR"] * (len(sources) - 1)
+    for sender in sources:
+        criteria += ["FROM", f'"{sender}"']
+    since = date.today() - timedelta(days=days)
+    criteria += ["SINCE", _imap_date(since)]
+    return criteria
+
+
+def _get_uidvalidity(mail: imaplib.IMAP4_SSL, mailbox: str) -> int:
+    """UIDVALIDITY del buzon seleccionado (si cambia, los UIDs viejos no sirven)."""
+    _typ, data = mail.response("UIDVALIDITY")
+    if data and data[0]:
+        return int(data[0])
+
+    status, data = mail.status(mailbox, "(UIDVALIDITY)")
+    if status == "OK" and data and data[0]:
+        m = re.search(rb"UIDVALIDITY\s+(\d+)", data[0])
+        if m:
+            return int(m.group(1))
+    raise RuntimeError(f"IMAP no reporto UIDVALIDITY para {mailbox}")
+
+
 def _safe_fetch(mail: imaplib.IMAP4_SSL, msg_id: bytes, what: str, retries: int = 1):
     for attempt in range(retries + 1):
         try:
-            return mail.fetch(msg_id, what)
+            return mail.uid("FETCH", msg_id, what)
         except _IMAP_ABORTS as e:
             if attempt >= retries:
                 error(f"[WARN] fetch failed msg_id={msg_id!r} what={what} err={e}")
@@ -326,17 +350,463 @@ def _safe_fetch(mail: imaplib.IMAP4_SSL, msg_id: bytes, what: str, retries: int
     return "NO", []
 
 
+_FETCH_RAW_WHAT = f"(BODY.PEEK[]<0.{RAW_FETCH_MAX_BYTES}>)"
+
+_FETCH_UID_RE = re.compile(rb"\bUID\s+(\d+)", re.IGNORECASE)
+
+
 def _fetch_email_bytes(mail: imaplib.IMAP4_SSL, msg_id: bytes) -> bytes:
     """
     Fetch liviano: primeros 200KB del mensaje.
     Esto suele incluir Subject/Date y los links.
     """
-    status, data = _safe_fetch(mail, msg_id, "(BODY.PEEK[]<0.200000>)", retries=1)
+    status, data = _safe_fetch(mail, msg_id, _FETCH_RAW_WHAT, retries=1)
     if status != "OK" or not data or not data[0]:
         return b""
     return data[0][1] if isinstance(data[0], tuple) else b""
 
 
+def _split_fetch_response(data: list) -> dict[int, bytes]:
+    """
+    Separa la respuesta de un UID FETCH multi-mensaje en {uid: bytes}.
+
+    imaplib entrega cada mensaje como tupla (b'<seq> (UID <uid> BODY[]<0> {n}', literal)
+    seguida de un b')' de cierre; los items que no son tupla se ignoran.
+    """
+    out: dict[int, bytes] = {}
+    for item in data or []:
+        if not isinstance(item, tuple) or len(item) < 2:
+            continue
+        m = _FETCH_UID_RE.search(item[0] or b"")
+        if m:
+            out[int(m.group(1))] = item[1] or b""
+    return out
+
+
+def _uid_message_set(msg_ids: list[bytes]) -> bytes:
+    """
+    Construye el message-set IMAP compactando UIDs consecutivos en rangos:
+    [1,2,3,7,9,10] -> b"1:3,7,9:10". Solo agrupa UIDs presentes en la lista.
+    """
+    uids = sorted({int(i) for i in msg_ids})
+    parts: list[str] = []
+    start = prev = None
+    for u in uids:
+        if prev is not None and u == prev + 1:
+            prev = u
+            continue
+        if start is not None:
+            parts.append(f"{start}:{prev}" if prev != start else str(start))
+        start = prev = u
+    if start is not None:
+        parts.append(f"{start}:{prev}" if prev != start else str(start))
+    return ",".join(parts).encode()
+
+
+def _fetch_email_bytes_batch(
+    mail: imaplib.IMAP4_SSL,
+    msg_ids: list[bytes],
+    what: str = _FETCH_RAW_WHAT,
+) -> dict[int, bytes]:
+    """
+    Trae varios mensajes en UN solo UID FETCH (message-set "uid1:uid3,uid7,...").
+
+    Si el chunk aborta, o faltan UIDs en la respuesta, cae a fetch individual
+    por mensaje (misma semantica de reintento que `_fetch_email_bytes`).
+    """
+    if not msg_ids:
+        return {}
+
+    fetched: dict[int, bytes] = {}
+    if len(msg_ids) > 1:
+        status, data = _safe_fetch(mail, _uid_message_set(msg_ids), what, retries=1)
+        if status == "OK":
+            fetched = _split_fetch_response(data)
+        else:
+            error(f"[WARN] fetch por lotes fallo ({len(msg_ids)} correos), reintentando uno a uno")
+
+    for msg_id in msg_ids:
+        if int(msg_id) not in fetched:
+            fetched[int(msg_id)] = _fetch_email_bytes(mail, msg_id)
+    return fetched
+
+
+# Headers mínimos que necesita el parse (Subject/Date) + los útiles para dedupe/cache
+_HEADER_FIELDS_ITEM = "BODY.PEEK[HEADER.FIELDS (SUBJECT DATE FROM MESSAGE-ID)]"
+
+_FETCH_MSG_START_RE = re.compile(rb"^\s*\d+\s+\(")
+_FETCH_SECTION_RE = re.compile(rb"BODY\[([^\]]*)\](?:<\d+>)?\s*\{\d+\}\s*$", re.IGNORECASE)
+
+
+def _fetch_bodystructures(mail: imaplib.IMAP4_SSL, msg_ids: list[bytes]) -> dict[int, list]:
+    """UID FETCH (BODYSTRUCTURE) por lotes -> {uid: estructura parseada}."""
+    status, data = _safe_fetch(mail, _uid_message_set(msg_ids), "(UID BODYSTRUCTURE)", retries=1)
+    if status != "OK":
+        return {}
+
+    # un mensaje puede venir partido en varios items si trae literales {n}
+    lines: list[bytes] = []
+    for item in data or []:
+        head = item[0] if isinstance(item, tuple) else item
+        piece = join_fetch_literals(item)
+        if not lines or _FETCH_MSG_START_RE.match(head or b""):
+            lines.append(piece)
+        else:
+            lines[-1] += piece
+
+    out: dict[int, list] = {}
+    for line in lines:
+        m = _FETCH_UID_RE.search(line)
+        structure = extract_bodystructure(line)
+        if m and structure:
+            out[int(m.group(1))] = structure
+    return out
+
+
+def _split_fetch_sections(data: list) -> dict[int, dict[str, bytes]]:
+    """
+    Separa un UID FETCH con varias secciones por mensaje en {uid: {seccion: bytes}}.
+    Los headers quedan bajo la clave "HEADER".
+    """
+    messages: list[dict] = []
+    for item in data or []:
+        head = item[0] if isinstance(item, tuple) else item
+        if not isinstance(head, bytes):
+            continue
+        if _FETCH_MSG_START_RE.match(head) or not messages:
+            messages.append({"uid": None, "sections": {}})
+        current = messages[-1]
+
+        m = _FETCH_UID_RE.search(head)
+        if m and current["uid"] is None:
+            current["uid"] = int(m.group(1))
+
+        if isinstance(item, tuple):
+            sm = _FETCH_SECTION_RE.search(head)
+            if sm:
+                key = sm.group(1).decode("ascii", errors="replace").strip().upper()
+                key = "HEADER" if key.startswith("HEADER") else key
+                current["sections"][key] = item[1] or b""
+
+    return {m["uid"]: m["sections"] for m in messages if m["uid"] is not None}
+
+
+def _fetch_email_structure_batch(mail: imaplib.IMAP4_SSL, msg_ids: list[bytes]) -> dict[int, bytes]:
+    """
+    Fetch guiado por BODYSTRUCTURE:
+      1) BODYSTRUCTURE de todo el chunk en un solo UID FETCH.
+      2) Solo Subject/Date + la text/html más larga + las text/plain
+         (sin imágenes ni adjuntos), agrupando mensajes con las mismas
+         secciones en un solo UID FETCH.
+      3) Reconstruye un RFC822 mínimo para que el parse sea el mismo.
+
+    No depende del corte de 200KB: la parte HTML se pide entera (hasta
+    IMAP_MAX_PART_BYTES) aunque empiece tarde en el correo.
+    Si algo falla, esos mensajes caen al fetch crudo de siempre.
+    """
+    if not msg_ids:
+        return {}
+
+    structures = _fetch_bodystructures(mail, msg_ids)
+
+    groups: dict[tuple[str, ...], list[tuple[bytes, list[TextPart]]]] = {}
+    fallback: list[bytes] = []
+    for msg_id in msg_ids:
+        structure = structures.get(int(msg_id))
+        parts = select_text_parts(structure) if structure else []
+        if not parts:
+            fallback.append(msg_id)
+            continue
+        groups.setdefault(tuple(p.section for p in parts), []).append((msg_id, parts))
+
+    out: dict[int, bytes] = {}
+    for sections, members in groups.items():
+        what = "(" + " ".join(
+            [_HEADER_FIELDS_ITEM] + [f"BODY.PEEK[{sec}]<0.{IMAP_MAX_PART_BYTES}>" for sec in sections]
+        ) + ")"
+        status, data = _safe_fetch(mail, _uid_message_set([m for m, _ in members]), what, retries=1)
+        by_uid = _split_fetch_sections(data) if status == "OK" else {}
+
+        for msg_id, parts in members:
+            found = by_uid.get(int(msg_id))
+            if not found or not any(found.get(p.section) for p in parts):
+                fallback.append(msg_id)
+                continue
+            bodies = [(p, found.get(p.section, b"")) for p in parts]
+            out[int(msg_id)] = build_minimal_message(found.get("HEADER", b""), bodies)
+
+    if fallback:
+        out.update(_fetch_email_bytes_batch(mail, fallback))
+    return out
+
+
+def _chunks(items: list, size: int) -> list[list]:
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# ----------------------------
+# Parse de un correo
+# ----------------------------
+
+# (subject, date_iso, [(link canónico, tipo)]) : picklable para el pool de procesos
+ParsedEmail = tuple[str, str, list[tuple[str, JobSource]]]
+
+
+def _parse_email_bytes(
+    raw: bytes,
+    msg_id: bytes,
+    not_before: datetime | None = None,
+) -> ParsedEmail | None:
+    """
+    Parsea un correo crudo (MIME + body + links + canonicalización) y retorna
+    (subject, date_iso, links). None si no se pudo parsear.
+    Si `not_before` viene dado, los correos con Date anterior no aportan links.
+
+    Es una función de módulo sin estado compartido: puede correr en otro proceso.
+    """
+    try:
+        msg = email.message_from_bytes(raw)
+    except Exception as e:
+        error(f"[WARN] cannot parse msg_id={msg_id!r}: {e}")
+        return None
+
+    subject = _decode_mime_header(msg.get("Subject", ""))
+    date_raw = msg.get("Date", "")
+    try:
+        dt = parsedate_to_datetime(date_raw) if date_raw else None
+        date_iso = dt.isoformat() if dt else ""
+    except Exception:
+        dt = None
+        date_iso = ""
+
+    if not_before and dt:
+        aware = dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+        if aware < not_before:
+            return subject, date_iso, []
+
+    text, html = _extract_body(msg)
+
+    # Pre-chequeo barato: si el cuerpo no menciona ninguna fuente registrada no hay nada que parsear
+    markers = job_host_markers()
+    if not has_job_hosts(html, markers):
+        html = ""
+    if not has_job_hosts(text, markers):
+        text = ""
+
+    # --- 1) Extraer links HTML con texto (para priorizar CTA) ---
+    html_pairs = _extract_links_from_html_with_text(html)
+
+    # CTA primero
+    cta_links: list[str] = []
+    other_links: list[str] = []
+    for href, anchor_text in html_pairs:
+        href = href.strip()
+        if not (href.startswith("http://") or href.startswith("https://")):
+            # si viniera relativo, aquí podrías resolverlo si tuvieras base; por ahora lo ignoramos
+            continue
+
+        if _CTA_TEXT_RE.search(anchor_text or ""):
+            cta_links.append(href)
+        else:
+            other_links.append(href)
+
+    cta_links = _dedupe_keep_order(cta_links)
+    other_links = _dedupe_keep_order(other_links)
+
+    # --- 2) URLs en texto plano ---
+    text_links = _extract_urls_from_text(text)
+
+    # --- 3) Orden de búsqueda:
+    # CTA (HTML) -> otras (HTML) -> texto
+    candidate_urls: list[tuple[str, bool]] = []
+    candidate_urls.extend([(u, True) for u in cta_links])
+    candidate_urls.extend([(u, False) for u in other_links])
+    candidate_urls.extend([(u, False) for u in text_links])
+
+    found: list[tuple[str, JobSource]] = []
+    for u, is_cta in candidate_urls:
+        canon, typ = _canonical_job_url_memo(u, is_cta=is_cta)
+        if canon and typ:
+            found.append((canon, typ))
+
+    # dedupe final por link
+    seen_links = set()
+    deduped: list[tuple[str, JobSource]] = []
+    for link, typ in found:
+        if link not in seen_links:
+            seen_links.add(link)
+            deduped.append((link, typ))
+
+    return subject, date_iso, deduped
+
+
+def _offers_from_parsed(parsed: ParsedEmail, seen_index: SeenOfferIndex | None = None) -> list[Offer]:
+    subject, date_iso, links = parsed
+    offers: list[Offer] = []
+    for link, typ in links:
+        # ofertas ya conocidas: ni siquiera se construye el Offer
+        if seen_index is not None and link in seen_index:
+            seen_index.skipped += 1
+            continue
+        offers.append(
+            Offer(
+                link=link,
+                reception_date=date_iso,
+                father_mail_subject=subject,
+                type_=typ,
+            )
+        )
+
+    success(f"Oferta detectada: {subject} | offers={len(offers)}")
+    return offers
+
+
+# ----------------------------
+# Pipeline fetch -> parse
+# ----------------------------
+
+_QUEUE_DONE = object()
+
+
+def _init_parse_worker(seed_links: dict[str, list]) -> None:
+    _seed_link_cache(seed_links)
+
+
+def _parse_email_bytes_in_worker(
+    raw: bytes,
+    msg_id: bytes,
+    not_before: datetime | None,
+) -> tuple[ParsedEmail | None, dict[str, list], Counter]:
+    """Versión para el pool: además devuelve los links nuevos y contadores del worker."""
+    parsed = _parse_email_bytes(raw, msg_id, not_before=not_before)
+    new_links, stats = _drain_link_cache()
+    return parsed, new_links, stats
+
+
+def _parse_pipeline(
+    fetched_chunks: Iterator[tuple[list[bytes], dict[int, bytes]]],
+    parse_workers: int,
+    not_before: datetime | None,
+) -> tuple[dict[int, ParsedEmail], set[int]]:
+    """
+    Productor/consumidor: los fetchers IMAP (hilo productor) dejan los bytes
+    crudos en una cola acotada y un ProcessPoolExecutor los parsea mientras
+    se sigue descargando. Con `parse_workers <= 0` se parsea en este mismo hilo.
+
+    Retorna ({uid: ParsedEmail}, uids_que_fallaron_en_fetch). El orden final
+    lo decide el llamador (por UID), así que el resultado es determinista.
+    """
+    results: dict[int, ParsedEmail] = {}
+    failed: set[int] = set()
+
+    if parse_workers <= 0:
+        for chunk, fetched in fetched_chunks:
+            for msg_id in chunk:
+                raw = fetched.get(int(msg_id), b"")
+                if not raw:
+                    failed.add(int(msg_id))
+                    continue
+                parsed = _parse_email_bytes(raw, msg_id, not_before=not_before)
+                if parsed is not None:
+                    results[int(msg_id)] = parsed
+        return results, failed
+
+    q: queue.Queue = queue.Queue(maxsize=PARSE_QUEUE_SIZE)
+    producer_error: list[BaseException] = []
+
+    def produce() -> None:
+        try:
+            for item in fetched_chunks:
+                q.put(item)
+        except BaseException as e:
+            producer_error.append(e)
+        finally:
+            q.put(_QUEUE_DONE)
+
+    producer = threading.Thread(target=produce, name="imap-producer", daemon=True)
+    producer.start()
+
+    # tope de correos en vuelo dentro del pool (cada uno son hasta ~200KB)
+    max_in_flight = parse_workers * PARSE_QUEUE_SIZE * 4
+    in_flight: deque[tuple[int, Future]] = deque()
+
+    def drain_one() -> None:
+        uid, fut = in_flight.popleft()
+        try:
+            parsed, new_links, stats = fut.result()
+        except Exception as e:
+            error(f"[WARN] cannot parse uid={uid}: {e}")
+            return
+        # lo aprendido por los workers vuelve al proceso principal para persistirse
+        _new_links.update(new_links)
+        _link_stats.update(stats)
+        if parsed is not None:
+            results[uid] = parsed
+
+    with ProcessPoolExecutor(
+        max_workers=parse_workers,
+        initializer=_init_parse_worker,
+        initargs=(dict(_persistent_links),),
+    ) as executor:
+        while True:
+            item = q.get()
+            if item is _QUEUE_DONE:
+                break
+            chunk, fetched = item
+            for msg_id in chunk:
+                raw = fetched.get(int(msg_id), b"")
+                if not raw:
+                    failed.add(int(msg_id))
+                    continue
+                while len(in_flight) >= max_in_flight:
+                    drain_one()
+                in_flight.append((int(msg_id), executor.submit(_parse_email_bytes_in_worker, raw, msg_id, not_before)))
+        while in_flight:
+            drain_one()
+
+    producer.join()
+    if producer_error:
+        raise producer_error[0]
+    return results, failed
+
+
+def _replay_offers(
+    mailbox: str,
+    days: int | None,
+    chunk_size: int,
+    parse_workers: int,
+    seen_index: SeenOfferIndex | None = None,
+) -> list[Offer]:
+    """
+    Modo offline: reconstruye las ofertas desde el cache local de correos,
+    sin tocar la red (ni el checkpoint IMAP). Sirve para re-correr la
+    extracción de links después de cambiar el parser.
+    """
+    entries = list(iter_cached_emails(mailbox))
+    print(f"Replay: {len(entries)} correos en cache para {mailbox}")
+    not_before = datetime.now(timezone.utc) - timedelta(days=days) if days is not None else None
+
+    # ids sintéticos (posición) porque los UIDs de distintas UIDVALIDITY pueden chocar
+    ids = [str(i).encode() for i in range(1, len(entries) + 1)]
+
+    def cached_chunks() -> Iterator[tuple[list[bytes], dict[int, bytes]]]:
+        for chunk in _chunks(ids, chunk_size):
+            yield chunk, {int(i): read_cached_email(entries[int(i) - 1][1]) for i in chunk}
+
+    # sin cache persistente de links: el replay existe para probar cambios del parser
+    _seed_link_cache({})
+    parsed_by_id, _failed = _parse_pipeline(cached_chunks(), parse_workers, not_before)
+    _report_link_cache(_drain_link_cache()[1])
+
+    offers: list[Offer] = []
+    for msg_id in ids:
+        parsed = parsed_by_id.get(int(msg_id))
+        if parsed is not None:
+            offers.extend(_offers_from_parsed(parsed, seen_index))
+    return offers
+
+
 # ----------------------------
 # Main
 # ----------------------------
@@ -345,19 +815,70 @@ def get_last_offers(
     mailbox: str = "INBOX",
     limit: int = 50,
     unseen_only: bool = False,
-    sources: tuple[str, ...] = (
-        "jobalerts-noreply@linkedin.com",
-        "empleos_ve@computrabajo.com",
-    ),
-) -> list[Offer]:
+    incremental: bool = False,
+    fetch_chunk_size: int = IMAP_FETCH_CHUNK_SIZE,
+    imap_workers: int = 1,
+    fetch_mode: str = "raw",
+    days: int | None = None,
+    parse_workers: int = 0,
+    raw_cache: bool = True,
+    replay: bool = False,
+    link_cache: bool = True,
+    seen_index: SeenOfferIndex | None = None,
+    sources: tuple[str, ...] | None = None,
+) -> tuple[list[Offer], PendingCheckpoint | None]:
     """
-    Retorna ofertas de los últimos `limit` correos POR CADA remitente en `sources`.
+    Retorna ofertas de los últimos `limit` correos POR CADA remitente en `sources`
+    (por defecto, los remitentes de todas las fuentes en utils.job_sources).
     Luego mezcla, dedupe por ID de mensaje y parsea sin ordenar por Date (para evitar cuelgues).
 
     Mejora clave:
     - Prioriza links CTA en HTML (p.ej. "Revisa la selección") para Computrabajo.
     - Computrabajo acepta links de selección solo si vienen del CTA.
+
+    Si `incremental=True`, usa el checkpoint persistente (UIDVALIDITY + último UID
+    procesado por remitente) y solo trae correos más nuevos que ese UID.
+    Si el UIDVALIDITY cambió, hace un escaneo completo y reinicia el checkpoint.
+    El checkpoint nuevo NO se guarda acá: se retorna como PendingCheckpoint
+    (None sin `incremental` o con `replay`) para que quien llama lo guarde
+    recién después de escribir las ofertas.
+
+    Los correos se traen de a `fetch_chunk_size` por UID FETCH (1 = uno por uno).
+    Con `imap_workers > 1` los chunks se reparten entre varias conexiones IMAP
+    (máximo IMAP_MAX_CONNECTIONS) y se parsean a medida que llegan.
+
+    `fetch_mode`:
+    - "raw": primeros 200KB del RFC822 completo.
+    - "structure": BODYSTRUCTURE + solo headers y partes de texto/HTML.
+
+    Si `days` viene dado, en lugar de los últimos `limit` por remitente se hace
+    UNA búsqueda server-side (OR FROM ... SINCE, o X-GM-RAW en Gmail) y se
+    retornan todos los correos de los últimos `days` días (`limit` no aplica).
+
+    Con `parse_workers > 0` el parse MIME + extracción/canonicalización de links
+    corre en un pool de procesos, en paralelo con las descargas IMAP.
+
+    Con `raw_cache=True` cada correo descargado se guarda comprimido en
+    RAW_EMAIL_CACHE_DIR (clave UIDVALIDITY+UID) y los ya cacheados no se
+    vuelven a descargar. Con `replay=True` no hay red: las ofertas salen
+    solo del cache (`days` se respeta, `limit` y `sources` no aplican).
+
+    La canonicalización de links pasa por un LRU (url, is_cta) y, con
+    `link_cache=True`, por un mapeo persistente url -> link canónico
+    (LINK_CACHE_PATH) que se siembra al inicio y se actualiza al final.
+
+    Si se pasa `seen_index`, los links ya conocidos no generan Offer: solo se
+    retornan ofertas nuevas y `seen_index.skipped` cuenta las omitidas.
+
+    Retorna (ofertas, checkpoint pendiente).
     """
+    if fetch_mode not in ("raw", "structure"):
+        raise ValueError(f"fetch_mode invalido: {fetch_mode!r} (usa 'raw' o 'structure')")
+
+    if replay:
+        return _replay_offers(mailbox, days, fetch_chunk_size, parse_workers, seen_index), None
+
+    sources = tuple(sources) if sources else job_senders()
 
     load_dotenv()
 
@@ -371,112 +892,123 @@ def get_last_offers(
             "Faltan credenciales IMAP en .env. Usa: IMAP_SERVER, GMAIL_USER, GMAIL_APP_PASSWORD (y opcional IMAP_PORT)."
         )
 
-    context = ssl.create_default_context()
-    mail = imaplib.IMAP4_SSL(host, port, ssl_context=context)
+    def connect() -> imaplib.IMAP4_SSL:
+        context = ssl.create_default_context()
+        conn = imaplib.IMAP4_SSL(host, port, ssl_context=context)
+        conn.login(user, password)
+        conn.select(mailbox)
+        return conn
+
+    mail = connect()
 
     try:
-        mail.login(user, password)
-        mail.select(mailbox)
 
-        # 1) IDs por remitente (tomamos últimos N por cada uno)
-        all_ids: list[bytes] = []
-        for sender in sources:
-            criteria = ["FROM", f'"{sender}"']
-            if unseen_only:
-                criteria = ["UNSEEN"] + criteria
+        uidvalidity = _get_uidvalidity(mail, mailbox)
+        checkpoint = load_imap_checkpoint(mailbox, uidvalidity) if incremental else {}
+        if incremental and not checkpoint:
+            print(f"Sin checkpoint valido para {mailbox} (UIDVALIDITY={uidvalidity}), escaneo completo")
 
-            ids = _safe_search(mail, criteria)
-            if not ids:
-                continue
+        all_ids: list[bytes] = []
+        ids_by_sender: dict[str, list[int]] = {}
+        not_before: datetime | None = None
+
+        if days is not None:
+            # 1) Una sola búsqueda server-side acotada por fecha (todos los remitentes)
+            last_uid = min((checkpoint.get(s, 0) for s in sources), default=0)
+            criteria = _build_window_criteria(mail, sources, days, last_uid, unseen_only)
+            ids = [i for i in _safe_search(mail, criteria) if int(i) > last_uid]
+            all_ids = list(reversed(ids))
+            # la búsqueda cubre a todos los remitentes: el checkpoint avanza igual para todos
+            for sender in sources:
+                ids_by_sender[sender] = [int(i) for i in all_ids]
+            # SINCE es por día (y en la zona del servidor): el corte exacto se hace al parsear
+            not_before = datetime.now(timezone.utc) - timedelta(days=days)
+            print(f"{len(all_ids)} correos en los ultimos {days} dias")
+        else:
+            # 1) UIDs por remitente (tomamos últimos N por cada uno)
+            for sender in sources:
+                last_uid = checkpoint.get(sender, 0)
+                criteria = ["FROM", f'"{sender}"']
+                if last_uid:
+                    criteria = ["UID", f"{last_uid + 1}:*"] + criteria
+                if unseen_only:
+                    criteria = ["UNSEEN"] + criteria
+
+                # "n:*" siempre incluye el último mensaje aunque su UID sea < n
+                ids = [i for i in _safe_search(mail, criteria) if int(i) > last_uid]
+                if not ids:
+                    continue
 
-            # ids vienen en orden ascendente (antiguos->nuevos), invertimos y cortamos
-            ids = list(reversed(ids))[: max(0, limit)]
-            all_ids.extend(ids)
+                # ids vienen en orden ascendente (antiguos->nuevos), invertimos y cortamos
+                ids = list(reversed(ids))[: max(0, limit)]
+                ids_by_sender[sender] = [int(i) for i in ids]
+                all_ids.extend(ids)
 
         # 2) Dedupe de IDs (mezcla)
         all_ids = _dedupe_keep_order_bytes(all_ids)
 
+        # 3) Descargar correos por lotes (un UID FETCH por chunk) y parsearlos
+        chunks = _chunks(all_ids, fetch_chunk_size)
+        workers = min(max(1, imap_workers), IMAP_MAX_CONNECTIONS, len(chunks) or 1)
+        fetch_from_imap = _fetch_email_structure_batch if fetch_mode == "structure" else _fetch_email_bytes_batch
+        cache = RawEmailCache(mailbox, uidvalidity, fetch_mode=fetch_mode) if raw_cache else None
+
+        def fetch_chunk(conn: imaplib.IMAP4_SSL, chunk: list[bytes]) -> dict[int, bytes]:
+            if cache is None:
+                return fetch_from_imap(conn, chunk)
+            # lo que ya está en cache no se vuelve a pedir al servidor
+            fetched: dict[int, bytes] = {}
+            for msg_id in chunk:
+                raw = cache.get(int(msg_id))
+                if raw:
+                    fetched[int(msg_id)] = raw
+            missing = [m for m in chunk if int(m) not in fetched]
+            if missing:
+                for uid, raw in fetch_from_imap(conn, missing).items():
+                    cache.put(uid, raw)
+                    fetched[uid] = raw
+            return fetched
+
+        def fetched_chunks() -> Iterator[tuple[list[bytes], dict[int, bytes]]]:
+            if workers <= 1:
+                for chunk in chunks:
+                    yield chunk, fetch_chunk(mail, chunk)
+                return
+            # N conexiones descargan shards en paralelo y se entregan apenas llegan
+            print(f"Descargando {len(all_ids)} correos con {workers} conexiones IMAP")
+            with ImapConnectionPool(connect, workers) as pool:
+                for idx, fetched in pool.imap_unordered(fetch_chunk, chunks):
+                    yield chunks[idx], fetched
+
+        _seed_link_cache(load_link_cache(LINK_CACHE_VERSION) if link_cache else {})
+        parsed_by_uid, failed_uids = _parse_pipeline(fetched_chunks(), parse_workers, not_before)
+        new_links, link_stats = _drain_link_cache()
+        _report_link_cache(link_stats)
+        if link_cache and new_links:
+            save_link_cache({**_persistent_links, **new_links}, LINK_CACHE_VERSION)
+
+        if cache is not None and (cache.hits or cache.misses):
+            print(f"Cache de correos: {cache.hits} hits, {cache.misses} descargados")
+
+        # 4) Ofertas en el orden original de los UIDs (determinista)
         offers: list[Offer] = []
-
-        # 3) Procesar cada correo
         for msg_id in all_ids:
-            raw = _fetch_email_bytes(mail, msg_id)
-            if not raw:
-                continue
-
-            try:
-                msg = email.message_from_bytes(raw)
-            except Exception as e:
-                error(f"[WARN] cannot parse msg_id={msg_id!r}: {e}")
-                continue
-
-            subject = _decode_mime_header(msg.get("Subject", ""))
-            date_raw = msg.get("Date", "")
-            try:
-                dt = parsedate_to_datetime(date_raw) if date_raw else None
-                date_iso = dt.isoformat() if dt else ""
-            except Exception:
-                date_iso = ""
-
-            text, html = _extract_body(msg)
-
-            # --- 1) Extraer links HTML con texto (para priorizar CTA) ---
-            html_pairs = _extract_links_from_html_with_text(html)
-
-            # CTA primero
-            cta_links: list[str] = []
-            other_links: list[str] = []
-            for href, anchor_text in html_pairs:
-                href = href.strip()
-                if not (href.startswith("http://") or href.startswith("https://")):
-                    # si viniera relativo, aquí podrías resolverlo si tuvieras base; por ahora lo ignoramos
-                    continue
-
-                if _CTA_TEXT_RE.search(anchor_text or ""):
-                    cta_links.append(href)
-                else:
-                    other_links.append(href)
-
-            cta_links = _dedupe_keep_order(cta_links)
-            other_links = _dedupe_keep_order(other_links)
-
-            # --- 2) URLs en texto plano ---
-            text_links = _extract_urls_from_text(text)
-
-            # --- 3) Orden de búsqueda:
-            # CTA (HTML) -> otras (HTML) -> texto
-            candidate_urls: list[tuple[str, bool]] = []
-            candidate_urls.extend([(u, True) for u in cta_links])
-            candidate_urls.extend([(u, False) for u in other_links])
-            candidate_urls.extend([(u, False) for u in text_links])
-
-            found: list[tuple[str, OfferTypeEnum]] = []
-            for u, is_cta in candidate_urls:
-                canon, typ = _canonical_job_url(u, is_cta=is_cta)
-                if canon and typ:
-                    found.append((canon, typ))
-
-            # dedupe final por link
-            seen_links = set()
-            deduped: list[tuple[str, OfferTypeEnum]] = []
-            for link, typ in found:
-                if link not in seen_links:
-                    seen_links.add(link)
-                    deduped.append((link, typ))
-
-            for link, typ in deduped:
-                offers.append(
-                    Offer(
-                        link=link,
-                        reception_date=date_iso,
-                        father_mail_subject=subject,
-                        type_=typ,
-                    )
+            parsed = parsed_by_uid.get(int(msg_id))
+            if parsed is not None:
+                offers.extend(_offers_from_parsed(parsed, seen_index))
+
+        pending_checkpoint = None
+        if incremental:
+            new_checkpoint = dict(checkpoint)
+            for sender, uids in ids_by_sender.items():
+                new_checkpoint[sender] = advance_checkpoint(
+                    checkpoint.get(sender, 0),
+                    uids,
+                    [u for u in uids if u in failed_uids],
                 )
+            pending_checkpoint = PendingCheckpoint(mailbox, uidvalidity, new_checkpoint)
 
-            success(f"Oferta detectada: {subject} | offers={len(deduped)}")
-
-        return offers
+        return offers, pending_checkpoint
 
     finally:
         try:
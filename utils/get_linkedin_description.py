@@ -1,7 +1,13 @@
-import os
-import requests
-from dotenv import load_dotenv
+from __future__ import annotations
+
 from html import unescape
+from typing import Callable
+
+import httpx
+
+from utils.http_cache import cached_get
+from utils.http_sessions import get_http_client
+from utils.scraper_errors import DescriptionParseError, HttpStatusError, parse_retry_after
 
 
 # ======================================================
@@ -34,7 +40,13 @@ def clean_text(text: str) -> str:
 # FUNCIÓN PRINCIPAL (VOYAGER API)
 # ======================================================
 
-def get_linkedin_description(job_url: str, timeout: int = 20) -> str:
+def get_linkedin_description(
+    job_url: str,
+    timeout: int = 20,
+    client: httpx.Client | None = None,
+    use_cache: bool = True,
+    throttle: Callable[[], None] | None = None,
+) -> str:
     """
     Obtiene el contenido de 'Acerca del empleo' usando la API interna
     Voyager de LinkedIn.
@@ -43,73 +55,42 @@ def get_linkedin_description(job_url: str, timeout: int = 20) -> str:
       LINKEDIN_LI_AT=...
       LINKEDIN_JSESSIONID="ajax:..."
 
+    Las cookies y headers se preparan una sola vez en el cliente compartido
+    (utils.http_sessions); `client` permite inyectar otro httpx.Client.
+    El payload pasa por el cache HTTP en disco salvo `use_cache=False`;
+    `throttle` se llama solo antes de un request real.
+
     Esta es la ÚNICA forma fiable actualmente.
     """
-
-    load_dotenv()
-
-    li_at = os.getenv("LINKEDIN_LI_AT")
-    jsessionid = os.getenv("LINKEDIN_JSESSIONID")
-
-    if not li_at or not jsessionid:
-        raise RuntimeError(
-            "❌ Cookies faltantes.\n"
-            "Tu .env debe contener (SIN espacios):\n"
-            "LINKEDIN_LI_AT=...\n"
-            'LINKEDIN_JSESSIONID="ajax:..."'
-        )
-
-    # Limpieza defensiva
-    li_at = li_at.strip().strip('"').strip("'")
-    jsessionid_raw = jsessionid.strip()
-
-    # JSESSIONID debe ir con comillas como cookie
-    if not (jsessionid_raw.startswith('"') and jsessionid_raw.endswith('"')):
-        jsessionid_cookie = f'"{jsessionid_raw.strip("\'\'").strip("\'")}"'
-    else:
-        jsessionid_cookie = jsessionid_raw
-
-    csrf_token = jsessionid_cookie.strip('"')
+    client = client or get_http_client("LINKEDIN")
 
     job_id = extract_job_id(job_url)
 
     voyager_url = f"https://www.linkedin.com/voyager/api/jobs/jobPostings/{job_id}"
 
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-            "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-        ),
-        "Accept": "application/json",
-        "x-restli-protocol-version": "2.0.0",
-        "csrf-token": csrf_token,
-        "Referer": job_url,
-    }
-
-    cookies = {
-        "li_at": li_at,
-        "JSESSIONID": jsessionid_cookie,
-    }
-
-    response = requests.get(
+    response = cached_get(
+        client,
         voyager_url,
-        headers=headers,
-        cookies=cookies,
         timeout=timeout,
+        headers={"Referer": job_url},
+        use_cache=use_cache,
+        throttle=throttle,
     )
 
     # ======================================================
     # ERRORES REALES DE LINKEDIN
     # ======================================================
 
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
     if response.status_code == 999:
-        raise RuntimeError("❌ LinkedIn bloqueó la request (999). Reduce velocidad.")
+        raise HttpStatusError("❌ LinkedIn bloqueó la request (999). Reduce velocidad.", 999, retry_after)
 
     if response.status_code == 403:
-        raise RuntimeError("❌ 403 Forbidden. Cookies inválidas o CSRF incorrecto.")
+        raise HttpStatusError("❌ 403 Forbidden. Cookies inválidas o CSRF incorrecto.", 403, retry_after)
 
     if response.status_code != 200:
-        raise RuntimeError(f"❌ HTTP {response.status_code} desde Voyager API.")
+        raise HttpStatusError(f"❌ HTTP {response.status_code} desde Voyager API.", response.status_code, retry_after)
 
     data = response.json()
 
@@ -120,7 +101,7 @@ def get_linkedin_description(job_url: str, timeout: int = 20) -> str:
     )
 
     if not description or len(description) < 100:
-        raise RuntimeError(
+        raise DescriptionParseError(
             "❌ No se encontró una descripción válida en el payload Voyager."
         )
 
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from html.parser import HTMLParser
+
+from bs4.dammit import EntitySubstitution, UnicodeDammit
+
+# Tags vacíos: BeautifulSoup (html.parser) los cierra al abrirlos, nunca
+# quedan en la pila de elementos abiertos.
+_VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link",
+    "menuitem", "meta", "param", "source", "track", "wbr", "basefont", "bgsound",
+    "command", "frame", "image", "isindex", "nextid", "spacer",
+})
+
+# El texto dentro de estos tags no cuenta para get_text() en BeautifulSoup
+_NON_TEXT_TAGS = frozenset({"script", "style", "template"})
+
+class _Bs4CharrefMixin:
+    """
+    Resuelve &entidades; y &#referencias; igual que el builder html.parser de
+    BeautifulSoup (no como convert_charrefs): una entidad desconocida queda
+    como "&nombre" sin el ";", y &#128;-&#159; se leen como windows-1252.
+    Requiere convert_charrefs=False en el parser.
+    """
+
+    def handle_charref(self, name):
+        if name.startswith("x"):
+            code = int(name.lstrip("x"), 16)
+        elif name.startswith("X"):
+            code = int(name.lstrip("X"), 16)
+        else:
+            code = int(name)
+        self.handle_data(UnicodeDammit.numeric_character_reference(code)[0])
+
+    def handle_entityref(self, name):
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else f"&{name}")
+
+
+def has_job_hosts(content: str, markers: tuple[str, ...]) -> bool:
+    """
+    Pre-chequeo barato (sin parsear) de si el contenido menciona algún host
+    de ofertas (`markers`, p.ej. utils.job_sources.job_host_markers()).
+    """
+    if not content:
+        return False
+    low = content.lower()
+    return any(marker in low for marker in markers)
+
+
+class _AnchorCollector(_Bs4CharrefMixin, HTMLParser):
+    """
+    Recolecta (href, texto) de cada <a href> a partir de los eventos del
+    parser, sin construir el árbol completo.
+
+    Replica lo que hace BeautifulSoup("html.parser") + a.get_text(" ", strip=True):
+    - el texto consecutivo entre dos tags cuenta como UN solo string,
+    - los <a> anidados o sin cerrar se cierran igual que en el árbol de bs4
+      (un end tag cierra todo lo abierto hasta su tag de apertura).
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=False)
+        self.pairs: list[tuple[str, list[str]]] = []
+        # pila de tags abiertos: (tag, indice en self.pairs o None)
+        self._stack: list[tuple[str, int | None]] = []
+        self._open_anchors: list[int] = []
+        self._text_run: list[str] = []
+        self._non_text_depth = 0
+
+    def _flush(self) -> None:
+        if not self._text_run:
+            return
+        text = "".join(self._text_run)
+        self._text_run = []
+        if self._non_text_depth:
+            return
+        for idx in self._open_anchors:
+            self.pairs[idx][1].append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in _VOID_TAGS:
+            return
+
+        anchor_idx = None
+        if tag == "a":
+            href = None
+            for name, value in attrs:
+                if name == "href":
+                    href = value or ""
+            if href is not None:
+                anchor_idx = len(self.pairs)
+                self.pairs.append((href, []))
+                self._open_anchors.append(anchor_idx)
+
+        if tag in _NON_TEXT_TAGS:
+            self._non_text_depth += 1
+        self._stack.append((tag, anchor_idx))
+
+    def handle_startendtag(self, tag, attrs):
+        # <a href="..."/> : en bs4 queda como <a> vacío
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if not any(t == tag for t, _ in self._stack):
+            return
+        while self._stack:
+            t, anchor_idx = self._stack.pop()
+            if anchor_idx is not None:
+                self._open_anchors.remove(anchor_idx)
+            if t in _NON_TEXT_TAGS:
+                self._non_text_depth -= 1
+            if t == tag:
+                break
+
+    def handle_data(self, data):
+        self._text_run.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        # <![CDATA[...]]> sí cuenta como texto (CData en bs4), como string aparte.
+        # bs4 lo guarda como CData aun dentro de <template>, así que cuenta aunque
+        # esté en un tag sin texto (en <script>/<style> el parser nunca lo emite).
+        if data.upper().startswith("CDATA["):
+            text = data[len("CDATA["):]
+            for idx in self._open_anchors:
+                self.pairs[idx][1].append(text)
+
+
+def extract_anchor_pairs(html: str) -> list[tuple[str, str]]:
+    """
+    Retorna [(href, anchor_text)] de cada <a href> no vacío, en orden de aparición.
+    Mismo resultado que recorrer soup.find_all("a", href=True) con bs4.
+    """
+    if not html:
+        return []
+    parser = _AnchorCollector()
+    parser.feed(html)
+    parser.close()
+    parser._flush()
+
+    out: list[tuple[str, str]] = []
+    for href, pieces in parser.pairs:
+        href = href.strip()
+        if not href:
+            continue
+        anchor_text = " ".join(" ".join(p.strip() for p in pieces if p.strip()).split())
+        out.append((href, anchor_text))
+    return out
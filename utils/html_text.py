@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from html.parser import HTMLParser
+
+from utils.html_link_extractor import _NON_TEXT_TAGS, _VOID_TAGS, _Bs4CharrefMixin
+
+# Dentro de estos tags BeautifulSoup no colapsa los strings de solo espacios
+_PRESERVE_WS_TAGS = frozenset({"pre", "textarea"})
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+
+class _TextCollector(_Bs4CharrefMixin, HTMLParser):
+    """
+    Junta los strings de texto de un fragmento HTML por eventos, sin árbol.
+
+    Replica BeautifulSoup(html, "html.parser").get_text(sep):
+    - el texto consecutivo entre dos tags es UN string,
+    - un string de solo espacios queda como "\\n" (si tiene salto) o " ",
+      salvo dentro de <pre>/<textarea>,
+    - script/style/template y comentarios no cuentan; CDATA sí (también
+      dentro de <template>, donde bs4 lo guarda como CData),
+    - entidades y referencias numéricas se resuelven como en bs4.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=False)
+        self.strings: list[str] = []
+        self._stack: list[str] = []
+        self._text_run: list[str] = []
+        self._non_text_depth = 0
+        self._preserve_depth = 0
+
+    def _flush(self) -> None:
+        if not self._text_run:
+            return
+        text = "".join(self._text_run)
+        self._text_run = []
+        if self._non_text_depth:
+            return
+        if not self._preserve_depth and not text.strip(_ASCII_SPACES):
+            text = "\n" if "\n" in text else " "
+        self.strings.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in _VOID_TAGS:
+            return
+        if tag in _NON_TEXT_TAGS:
+            self._non_text_depth += 1
+        if tag in _PRESERVE_WS_TAGS:
+            self._preserve_depth += 1
+        self._stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag not in self._stack:
+            return
+        while self._stack:
+            t = self._stack.pop()
+            if t in _NON_TEXT_TAGS:
+                self._non_text_depth -= 1
+            if t in _PRESERVE_WS_TAGS:
+                self._preserve_depth -= 1
+            if t == tag:
+                break
+
+    def handle_data(self, data):
+        self._text_run.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            self.strings.append(data[len("CDATA["):])
+
+
+def html_to_text(html: str, separator: str = "") -> str:
+    """Mismo resultado que BeautifulSoup(html, "html.parser").get_text(separator)."""
+    if not html:
+        return ""
+    parser = _TextCollector()
+    parser.feed(html)
+    parser.close()
+    parser._flush()
+    return separator.join(parser.strings)
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Callable
+
+import httpx
+
+from utils.MACROS import HTTP_CACHE_DIR, HTTP_CACHE_MAX_AGE, HTTP_CACHE_TTL
+from utils.scraper_errors import UnexpectedContentError
+
+# headers que se guardan junto al body (el body se guarda ya decodificado)
+_KEPT_HEADERS = ("content-type", "etag", "last-modified")
+
+_STREAM_CHUNK_SIZE = 16 * 1024
+
+# stop_when(body, inicio_del_ultimo_chunk) -> True si ya no hace falta seguir leyendo
+StopCondition = Callable[[bytearray, int], bool]
+
+
+def _cache_path(url: str, directory: str) -> str:
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return os.path.join(directory, key[:2], f"{key}.gz")
+
+
+def _read_entry(path: str) -> tuple[dict, bytes] | None:
+    """Formato: primera línea JSON con metadatos, el resto es el body. Todo gzip."""
+    try:
+        with gzip.open(path, "rb") as f:
+            meta = json.loads(f.readline())
+            body = f.read()
+    except (OSError, EOFError, ValueError):
+        return None
+    return meta, body
+
+
+def _write_entry(path: str, meta: dict, body: bytes) -> None:
+    # temporal único: varios hilos pueden escribir la misma URL a la vez
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.write(json.dumps(meta, ensure_ascii=False).encode("utf-8") + b"\n")
+            f.write(body)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def check_content(resp: httpx.Response, max_bytes: int | None, content_types: tuple[str, ...] | None) -> None:
+    """Rechaza antes de leer el body lo que no es del tipo esperado o declara ser demasiado grande."""
+    ctype = resp.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_types and ctype and ctype not in content_types:
+        raise UnexpectedContentError(f"❌ Contenido inesperado ({ctype}) en {str(resp.url)[:60]}")
+    length = resp.headers.get("content-length", "")
+    if max_bytes and length.isdigit() and int(length) > max_bytes:
+        raise UnexpectedContentError(f"❌ Respuesta demasiado grande ({int(length)} bytes) en {str(resp.url)[:60]}")
+
+
+def read_capped(
+    resp: httpx.Response,
+    max_bytes: int | None,
+    stop_when: StopCondition | None = None,
+) -> tuple[bytes, bool]:
+    """
+    Lee en streaming el body (ya decodificado) de `resp` hasta `max_bytes`
+    o hasta que `stop_when` indique que lo necesario ya llegó.
+
+    Retorna (body, truncado): truncado es True si se dejó de leer antes del
+    final del stream (por el tope o por `stop_when`).
+    """
+    body = bytearray()
+    for chunk in resp.iter_bytes(_STREAM_CHUNK_SIZE):
+        start = len(body)
+        body += chunk
+        if max_bytes and len(body) >= max_bytes:
+            del body[max_bytes:]
+            return bytes(body), True
+        if stop_when is not None and stop_when(body, start):
+            return bytes(body), True
+    return bytes(body), False
+
+
+def detached_response(resp: httpx.Response, body: bytes, truncated: bool = False) -> httpx.Response:
+    """Respuesta ya leída (y cerrable) con el body parcial de un stream."""
+    headers = {h: resp.headers[h] for h in (*_KEPT_HEADERS, "retry-after") if h in resp.headers}
+    return httpx.Response(
+        resp.status_code,
+        headers=headers,
+        content=body,
+        request=resp.request,
+        extensions={"truncated": truncated},
+    )
+
+
+def is_truncated(resp: httpx.Response) -> bool:
+    """True si el body de `resp` (bajado ahora o guardado en la caché) no es la página completa."""
+    return bool(resp.extensions.get("truncated"))
+
+
+def _fetch(
+    client: httpx.Client,
+    url: str,
+    headers: dict | None,
+    timeout: float,
+    max_bytes: int | None,
+    stop_when: StopCondition | None,
+    content_types: tuple[str, ...] | None,
+) -> httpx.Response:
+    if max_bytes is None and stop_when is None and content_types is None:
+        return client.get(url, headers=headers, timeout=timeout)
+    with client.stream("GET", url, headers=headers, timeout=timeout) as resp:
+        body, truncated = b"", False
+        if resp.status_code == 200:
+            check_content(resp, max_bytes, content_types)
+            body, truncated = read_capped(resp, max_bytes, stop_when)
+        return detached_response(resp, body, truncated)
+
+
+def _as_response(meta: dict, body: bytes) -> httpx.Response:
+    return httpx.Response(
+        meta["status"],
+        headers=meta.get("headers") or {},
+        content=body,
+        request=httpx.Request("GET", meta.get("final_url") or meta["url"]),
+        extensions={"truncated": bool(meta.get("truncated"))},
+    )
+
+
+def cached_get(
+    client: httpx.Client,
+    url: str,
+    timeout: float,
+    headers: dict | None = None,
+    use_cache: bool = True,
+    throttle: Callable[[], None] | None = None,
+    ttl: float = HTTP_CACHE_TTL,
+    directory: str = HTTP_CACHE_DIR,
+    max_bytes: int | None = None,
+    stop_when: StopCondition | None = None,
+    content_types: tuple[str, ...] | None = None,
+    refresh: bool = False,
+) -> httpx.Response:
+    """
+    GET con caché en disco (bodies gzip) indexada por URL.
+
+    - Entrada con menos de `ttl` segundos: se devuelve sin tocar la red.
+    - Entrada vencida con ETag/Last-Modified: GET condicional; un 304 renueva
+      la entrada y devuelve el body guardado.
+    - Solo se guardan respuestas 200. `use_cache=False` la ignora por completo.
+
+    `throttle` (p.ej. `limiter.acquire`) se llama justo antes de cada request
+    real, así las respuestas servidas desde disco no gastan cupo.
+
+    Con `max_bytes`, `stop_when` o `content_types` la descarga es en streaming:
+    se rechaza de entrada un content-type no esperado o un Content-Length mayor
+    al tope, y se deja de leer al llegar al tope o cuando `stop_when` lo indique
+    (se guarda y devuelve solo lo leído, marcado como truncado: ver `is_truncated`).
+
+    `refresh=True` ignora la entrada guardada (p.ej. un body truncado que no
+    alcanzó) y la reemplaza con lo que se baje.
+    """
+    if not use_cache:
+        if throttle:
+            throttle()
+        return _fetch(client, url, headers, timeout, max_bytes, stop_when, content_types)
+
+    path = _cache_path(url, directory)
+    entry = None if refresh else _read_entry(path)
+    now = time.time()
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        meta, body = entry
+        if now - meta.get("stored_at", 0) < ttl:
+            return _as_response(meta, body)
+        stored = meta.get("headers") or {}
+        if stored.get("etag"):
+            request_headers["If-None-Match"] = stored["etag"]
+        if stored.get("last-modified"):
+            request_headers["If-Modified-Since"] = stored["last-modified"]
+
+    if throttle:
+        throttle()
+    resp = _fetch(client, url, request_headers, timeout, max_bytes, stop_when, content_types)
+
+    if resp.status_code == 304 and entry is not None:
+        meta, body = entry
+        meta["stored_at"] = now
+        try:
+            _write_entry(path, meta, body)
+        except OSError:
+            pass
+        return _as_response(meta, body)
+
+    if resp.status_code == 200:
+        store_response(url, resp, directory=directory)
+
+    return resp
+
+
+def store_response(url: str, resp: httpx.Response, directory: str = HTTP_CACHE_DIR) -> None:
+    """
+    Guarda en la caché una respuesta 200 ya leída (p.ej. la que se obtuvo
+    al seguir un redirect), para que el siguiente `cached_get(url)` no baje nada.
+    """
+    meta = {
+        "url": url,
+        "final_url": str(resp.url),
+        "status": 200,
+        "headers": {h: resp.headers[h] for h in _KEPT_HEADERS if h in resp.headers},
+        "stored_at": time.time(),
+        "truncated": is_truncated(resp),
+    }
+    try:
+        _write_entry(_cache_path(url, directory), meta, resp.content)
+    except OSError:
+        pass
+
+
+def prune_http_cache(max_age: float = HTTP_CACHE_MAX_AGE, directory: str = HTTP_CACHE_DIR) -> int:
+    """
+    Borra las entradas (y temporales huérfanos) que no se escriben ni renuevan
+    hace más de `max_age` segundos; pasado el TTL una entrada solo sirve para
+    el GET condicional, y sin esto el directorio crece sin límite.
+    Retorna cuántos archivos se borraron.
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        subdirs = [e.path for e in os.scandir(directory) if e.is_dir()]
+    except OSError:
+        return 0
+    for subdir in subdirs:
+        try:
+            with os.scandir(subdir) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                        removed += 1
+            os.rmdir(subdir)  # solo si quedó vacío
+        except OSError:
+            pass
+    return removed
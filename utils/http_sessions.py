@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import atexit
+import importlib.util
+import os
+import threading
+from functools import lru_cache
+
+import httpx
+from dotenv import load_dotenv
+
+from utils.MACROS import HTTP_MAX_CONNECTIONS, HTTP_TIMEOUT
+
+_UA = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+)
+
+# HTTP/2 solo si está instalado el extra `h2` (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_clients: dict[str, httpx.Client] = {}
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def linkedin_credentials() -> tuple[str, str]:
+    """
+    Lee y limpia UNA vez las cookies de LinkedIn del .env.
+    Retorna (li_at, jsessionid_cookie) con JSESSIONID entre comillas.
+
+    REQUISITOS (.env SIN ESPACIOS):
+      LINKEDIN_LI_AT=...
+      LINKEDIN_JSESSIONID="ajax:..."
+    """
+    load_dotenv()
+
+    li_at = os.getenv("LINKEDIN_LI_AT")
+    jsessionid = os.getenv("LINKEDIN_JSESSIONID")
+
+    if not li_at or not jsessionid:
+        raise RuntimeError(
+            "❌ Cookies faltantes.\n"
+            "Tu .env debe contener (SIN espacios):\n"
+            "LINKEDIN_LI_AT=...\n"
+            'LINKEDIN_JSESSIONID="ajax:..."'
+        )
+
+    # Limpieza defensiva
+    li_at = li_at.strip().strip('"').strip("'")
+    jsessionid_raw = jsessionid.strip()
+
+    # JSESSIONID debe ir con comillas como cookie
+    if not (jsessionid_raw.startswith('"') and jsessionid_raw.endswith('"')):
+        jsessionid_cookie = '"' + jsessionid_raw.strip("'") + '"'
+    else:
+        jsessionid_cookie = jsessionid_raw
+
+    return li_at, jsessionid_cookie
+
+
+def _build_client(source: str) -> httpx.Client:
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+    )
+
+    if source == "LINKEDIN":
+        li_at, jsessionid_cookie = linkedin_credentials()
+        headers = {
+            "User-Agent": (
+                "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+            ),
+            "Accept": "application/json",
+            "x-restli-protocol-version": "2.0.0",
+            "csrf-token": jsessionid_cookie.strip('"'),
+            # header explícito: el JSESSIONID debe viajar con sus comillas tal cual
+            "Cookie": f"li_at={li_at}; JSESSIONID={jsessionid_cookie}",
+        }
+        return httpx.Client(headers=headers, http2=HTTP2_AVAILABLE, limits=limits, timeout=HTTP_TIMEOUT)
+
+    headers = {
+        "User-Agent": _UA,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "es-ES,es;q=0.9,en;q=0.8",
+        "Cache-Control": "no-cache",
+        "Pragma": "no-cache",
+    }
+    return httpx.Client(
+        headers=headers,
+        http2=HTTP2_AVAILABLE,
+        limits=limits,
+        timeout=HTTP_TIMEOUT,
+        follow_redirects=True,
+    )
+
+
+def get_http_client(source: str) -> httpx.Client:
+    """
+    Cliente HTTP compartido por fuente ("LINKEDIN", "COMPUTRABAJO"): conexiones
+    keep-alive reutilizadas entre ofertas (un solo handshake TCP+TLS por host),
+    headers/cookies preparados una vez. httpx.Client es thread-safe.
+    """
+    with _lock:
+        client = _clients.get(source)
+        if client is None:
+            client = _build_client(source)
+            _clients[source] = client
+        return client
+
+
+def set_http_client(source: str, client: httpx.Client) -> None:
+    """
+    Reemplaza el cliente de una fuente (p.ej. uno con httpx.MockTransport o
+    apuntando a un servidor local en pruebas).
+    """
+    with _lock:
+        old = _clients.get(source)
+        _clients[source] = client
+    if old is not None and old is not client:
+        old.close()
+
+
+@atexit.register
+def close_http_clients() -> None:
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+# ----------------------------
+# Parser de listas IMAP (BODYSTRUCTURE)
+# ----------------------------
+
+_TOKEN_RE = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|([^\s()"]+))', re.DOTALL)
+
+
+def join_fetch_literals(item) -> bytes:
+    """
+    imaplib parte la respuesta cuando el servidor manda literales {n}:
+    (b'... "filename" {8}', b'a\\nb.pdf') -> los re-unimos como string entre comillas.
+    """
+    if isinstance(item, bytes):
+        return item
+    head, literal = item[0], item[1]
+    head = re.sub(rb"\{\d+\}$", b"", head)
+    quoted = literal.replace(b"\\", b"\\\\").replace(b'"', b'\\"')
+    return head + b'"' + quoted + b'"'
+
+
+def parse_imap_list(data: bytes) -> list:
+    """
+    Convierte una lista parentizada IMAP en listas de Python.
+    Strings -> str, NIL -> None, numeros -> str (el llamador decide).
+    """
+    stack: list[list] = [[]]
+    pos = 0
+    while pos < len(data):
+        m = _TOKEN_RE.match(data, pos)
+        if not m or m.end() == pos:
+            break
+        pos = m.end()
+        if m.group(1):
+            stack.append([])
+        elif m.group(2):
+            if len(stack) == 1:
+                break
+            done = stack.pop()
+            stack[-1].append(done)
+        elif m.group(3) is not None:
+            raw = re.sub(rb"\\(.)", rb"\1", m.group(3))
+            stack[-1].append(raw.decode("utf-8", errors="replace"))
+        else:
+            atom = m.group(4).decode("ascii", errors="replace")
+            stack[-1].append(None if atom.upper() == "NIL" else atom)
+    while len(stack) > 1:
+        done = stack.pop()
+        stack[-1].append(done)
+    return stack[0]
+
+
+def extract_bodystructure(fetch_line: bytes) -> list | None:
+    """Del texto de un FETCH (... BODYSTRUCTURE (...)) retorna la estructura parseada."""
+    idx = fetch_line.upper().find(b"BODYSTRUCTURE")
+    if idx == -1:
+        return None
+    parsed = parse_imap_list(fetch_line[idx + len(b"BODYSTRUCTURE"):])
+    return parsed[0] if parsed and isinstance(parsed[0], list) else None
+
+
+# ----------------------------
+# Partes de texto
+# ----------------------------
+
+@dataclass(frozen=True)
+class TextPart:
+    section: str
+    subtype: str          # "html" | "plain"
+    charset: str
+    encoding: str         # 7bit, base64, quoted-printable, ...
+    size: int
+
+
+def _params(value) -> dict[str, str]:
+    if not isinstance(value, list):
+        return {}
+    out: dict[str, str] = {}
+    for i in range(0, len(value) - 1, 2):
+        if isinstance(value[i], str) and isinstance(value[i + 1], str):
+            out[value[i].lower()] = value[i + 1]
+    return out
+
+
+def _is_attachment(part: list, disposition_index: int) -> bool:
+    if len(part) <= disposition_index:
+        return False
+    disp = part[disposition_index]
+    return isinstance(disp, list) and bool(disp) and str(disp[0]).lower() == "attachment"
+
+
+def _walk(structure: list, prefix: str, out: list[TextPart]) -> None:
+    if not structure:
+        return
+
+    # multipart: ((parte1)(parte2) "ALTERNATIVE" ...)
+    if isinstance(structure[0], list):
+        n = 0
+        for child in structure:
+            if not isinstance(child, list):
+                break
+            n += 1
+            _walk(child, f"{prefix}.{n}" if prefix else str(n), out)
+        return
+
+    ctype = str(structure[0] or "").lower()
+    subtype = str(structure[1] or "").lower() if len(structure) > 1 else ""
+    section = prefix or "1"
+
+    # mensaje adjunto: su cuerpo está en el índice 8 (igual que msg.walk(), lo recorremos)
+    if ctype == "message" and subtype == "rfc822" and len(structure) > 8 and isinstance(structure[8], list):
+        inner = structure[8]
+        _walk(inner, section if inner and isinstance(inner[0], list) else f"{section}.1", out)
+        return
+
+    if ctype != "text" or subtype not in ("html", "plain"):
+        return
+
+    # text/*: type subtype params id desc encoding size lines md5 disposition ...
+    if _is_attachment(structure, 9):
+        return
+
+    params = _params(structure[2] if len(structure) > 2 else None)
+    encoding = str(structure[5] or "7bit").lower() if len(structure) > 5 else "7bit"
+    try:
+        size = int(structure[6]) if len(structure) > 6 and structure[6] else 0
+    except ValueError:
+        size = 0
+
+    out.append(
+        TextPart(
+            section=section,
+            subtype=subtype,
+            charset=params.get("charset", "utf-8"),
+            encoding=encoding,
+            size=size,
+        )
+    )
+
+
+def select_text_parts(structure: list) -> list[TextPart]:
+    """
+    Igual criterio que `_extract_body`: todas las text/plain y solo la
+    text/html más larga, ignorando adjuntos.
+    """
+    parts: list[TextPart] = []
+    _walk(structure, "", parts)
+    plain = [p for p in parts if p.subtype == "plain"]
+    html = [p for p in parts if p.subtype == "html"]
+    if html:
+        plain.append(max(html, key=lambda p: p.size))
+    return plain
+
+
+# ----------------------------
+# Reconstrucción
+# ----------------------------
+
+_BOUNDARY = b"=_chambapuller_part_"
+
+
+def build_minimal_message(headers: bytes, parts: list[tuple[TextPart, bytes]]) -> bytes:
+    """
+    Arma un RFC822 multipart mínimo con los headers pedidos (Subject/Date) y
+    solo las partes de texto descargadas, conservando su Content-Transfer-Encoding
+    y charset. Así el resto del pipeline (`email.message_from_bytes`,
+    `_extract_body`) funciona igual que con el correo completo.
+    """
+    out = [headers.rstrip(b"\r\n")] if headers.strip() else []
+    out.append(b"MIME-Version: 1.0")
+    out.append(b'Content-Type: multipart/mixed; boundary="' + _BOUNDARY + b'"')
+    out.append(b"")
+    for part, body in parts:
+        out.append(b"--" + _BOUNDARY)
+        out.append(f'Content-Type: text/{part.subtype}; charset="{part.charset}"'.encode())
+        out.append(f"Content-Transfer-Encoding: {part.encoding}".encode())
+        out.append(b"")
+        out.append(body)
+    out.append(b"--" + _BOUNDARY + b"--")
+    out.append(b"")
+    return b"\r\n".join(out)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from utils.MACROS import IMAP_CHECKPOINT_PATH
+from utils.json_store import load_json, save_json
+
+
+def load_imap_checkpoint(
+    mailbox: str,
+    uidvalidity: int,
+    path: str = IMAP_CHECKPOINT_PATH,
+) -> dict[str, int]:
+    """
+    Retorna {remitente: ultimo_uid_procesado} para el buzon `mailbox`.
+
+    Si el UIDVALIDITY guardado no coincide con el actual, los UIDs viejos
+    ya no significan nada: retorna {} para forzar un escaneo completo.
+    """
+    state = load_json(path, {})
+    entry = state.get(mailbox)
+    if not isinstance(entry, dict) or entry.get("uidvalidity") != uidvalidity:
+        return {}
+    senders = entry.get("senders") or {}
+    return {str(k): int(v) for k, v in senders.items()}
+
+
+def save_imap_checkpoint(
+    mailbox: str,
+    uidvalidity: int,
+    senders_last_uid: dict[str, int],
+    path: str = IMAP_CHECKPOINT_PATH,
+) -> None:
+    """Guarda el checkpoint {remitente: ultimo_uid} del buzon `mailbox`."""
+    state = load_json(path, {})
+    state[mailbox] = {
+        "uidvalidity": uidvalidity,
+        "senders": dict(senders_last_uid),
+    }
+    save_json(path, state)
+
+
+@dataclass
+class PendingCheckpoint:
+    """
+    Checkpoint calculado por una ingesta pero todavía sin guardar: se guarda
+    recién cuando las ofertas de esos correos quedaron en disco, así un corte
+    a mitad de corrida no salta correos cuyas ofertas nunca se escribieron.
+    """
+
+    mailbox: str
+    uidvalidity: int
+    senders_last_uid: dict[str, int]
+
+    def save(self, path: str = IMAP_CHECKPOINT_PATH) -> None:
+        save_imap_checkpoint(self.mailbox, self.uidvalidity, self.senders_last_uid, path)
+
+
+def advance_checkpoint(previous: int, uids: list[int], failed: list[int]) -> int:
+    """
+    Calcula el nuevo ultimo UID procesado para un remitente.
+
+    Avanza hasta el mayor UID visto, salvo que algun fetch haya fallado:
+    en ese caso se queda justo antes del primer fallo para reintentarlo
+    en la siguiente corrida.
+    """
+    if not uids:
+        return previous
+    if failed:
+        return max(previous, min(failed) - 1)
+    return max(previous, max(uids))
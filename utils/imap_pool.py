@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import imaplib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class ImapConnectionPool:
+    """
+    Pool de N conexiones IMAP autenticadas, una por hilo worker.
+
+    Cada hilo abre (perezosamente) su propia conexión con `connect()` y la
+    reutiliza para todos los shards que le toquen; imaplib no es thread-safe,
+    así que nunca se comparte una conexión entre hilos.
+    """
+
+    def __init__(self, connect: Callable[[], imaplib.IMAP4], size: int) -> None:
+        self._connect = connect
+        self.size = max(1, size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[imaplib.IMAP4] = []
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="imap")
+
+    def _get_connection(self) -> imaplib.IMAP4:
+        mail = getattr(self._local, "mail", None)
+        if mail is None:
+            mail = self._connect()
+            self._local.mail = mail
+            with self._lock:
+                self._connections.append(mail)
+        return mail
+
+    def _run(self, fn: Callable[[imaplib.IMAP4, T], R], shard: T) -> R:
+        return fn(self._get_connection(), shard)
+
+    def imap_unordered(
+        self,
+        fn: Callable[[imaplib.IMAP4, T], R],
+        shards: list[T],
+    ) -> Iterator[tuple[int, R]]:
+        """
+        Ejecuta fn(conexion, shard) para cada shard y entrega (indice, resultado)
+        a medida que terminan, para que el consumidor procese mientras los demás
+        shards siguen descargándose.
+        """
+        futures = {self._executor.submit(self._run, fn, shard): i for i, shard in enumerate(shards)}
+        for fut in as_completed(futures):
+            yield futures[fut], fut.result()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        for mail in self._connections:
+            try:
+                mail.close()
+            except Exception:
+                pass
+            try:
+                mail.logout()
+            except Exception:
+                pass
+        self._connections.clear()
+
+    def __enter__(self) -> "ImapConnectionPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
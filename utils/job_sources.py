@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable
+from urllib.parse import urlparse
+
+from utils.MACROS import DESCRIPTION_MAX_CONCURRENCY, RATE_LIMITS
+from utils.get_computrabajo_description import get_computrabajo_description
+from utils.get_linkedin_description import get_linkedin_description
+from utils.job_url_canonical import canonical_computrabajo_url, canonical_linkedin_job_url
+
+# fetch_description(link, use_cache=..., throttle=...) -> descripción
+DescriptionFetcher = Callable[..., str]
+# fetch_batch(links, use_cache=..., throttle=...) -> {link: descripción o excepción}
+BatchDescriptionFetcher = Callable[..., "dict[str, str | Exception]"]
+
+
+@dataclass(frozen=True, eq=False)
+class JobSource:
+    """
+    Una bolsa de empleo: cómo reconocer y canonicalizar sus links, de qué
+    remitentes llegan sus correos, cómo bajar la descripción de una oferta
+    y con qué concurrencia / rate limit hacerlo.
+
+    Si declara `fetch_batch` (y `batch_size > 1`) sus descripciones se piden
+    de a lotes en lugar de una por una.
+    """
+
+    name: str
+    host_marker: str
+    senders: tuple[str, ...]
+    canonicalize: Callable[[str, bool], "str | None"]
+    fetch_description: DescriptionFetcher
+    max_concurrency: int = 1
+    rate_limit: dict = field(default_factory=lambda: {"rate": 0.2, "min_rate": 0.01, "max_rate": 0.2})
+    fetch_batch: BatchDescriptionFetcher | None = None
+    batch_size: int = 1
+
+    @property
+    def batchable(self) -> bool:
+        return self.fetch_batch is not None and self.batch_size > 1
+
+    def matches(self, link: str) -> bool:
+        return self.host_marker in (urlparse(link).netloc or "").lower()
+
+    def __reduce__(self):
+        # entre procesos viaja solo el nombre: del otro lado es la misma instancia registrada
+        return get_source, (self.name,)
+
+    def __repr__(self) -> str:
+        return f"JobSource({self.name})"
+
+
+# orden de registro = prioridad al canonicalizar un link
+_SOURCES: dict[str, JobSource] = {}
+
+
+def register_source(source: JobSource) -> None:
+    _SOURCES[source.name] = source
+
+
+def get_source(name: str) -> JobSource | None:
+    return _SOURCES.get(name)
+
+
+def iter_sources() -> list[JobSource]:
+    return list(_SOURCES.values())
+
+
+def source_for_link(link: str) -> JobSource | None:
+    """Fuente de un link ya canónico (p.ej. leído del excel), por su host."""
+    for source in _SOURCES.values():
+        if source.matches(link):
+            return source
+    return None
+
+
+def canonicalize_job_url(url: str, is_cta: bool = False) -> tuple[str | None, JobSource | None]:
+    """Primer canonicalizador registrado que acepta la URL: (link canónico, fuente)."""
+    for source in _SOURCES.values():
+        canon = source.canonicalize(url, is_cta)
+        if canon:
+            return canon, source
+    return None, None
+
+
+def job_host_markers() -> tuple[str, ...]:
+    return tuple(source.host_marker for source in _SOURCES.values())
+
+
+def job_senders() -> tuple[str, ...]:
+    return tuple(sender for source in _SOURCES.values() for sender in source.senders)
+
+
+register_source(JobSource(
+    name="LINKEDIN",
+    host_marker="linkedin",
+    senders=("jobalerts-noreply@linkedin.com",),
+    canonicalize=canonical_linkedin_job_url,
+    fetch_description=get_linkedin_description,
+    max_concurrency=DESCRIPTION_MAX_CONCURRENCY["LINKEDIN"],
+    rate_limit=RATE_LIMITS["LINKEDIN"],
+))
+
+register_source(JobSource(
+    name="COMPUTRABAJO",
+    host_marker="computrabajo",
+    senders=("empleos_ve@computrabajo.com",),
+    canonicalize=canonical_computrabajo_url,
+    fetch_description=get_computrabajo_description,
+    max_concurrency=DESCRIPTION_MAX_CONCURRENCY["COMPUTRABAJO"],
+    rate_limit=RATE_LIMITS["COMPUTRABAJO"],
+))
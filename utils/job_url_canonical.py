@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import re
+from urllib.parse import urlparse, parse_qs, unquote, urlunparse
+
+# Canonicalizadores de links de ofertas por fuente (ver utils.job_sources):
+# reciben una URL cruda de un correo y retornan el link canónico de la
+# oferta, o None si no es una oferta de esa fuente.
+
+# paths típicos que NO son ofertas (evitar basura)
+_CT_BAD_PATH_RE = re.compile(
+    r"(unsubscribe|unsub|baja|cancel|privacidad|privacy|terminos|terms|ayuda|help|faq|soporte|support)",
+    re.IGNORECASE,
+)
+
+
+def _unwrap_tracking(url: str) -> str:
+    try:
+        parsed = urlparse(url)
+        qs = parse_qs(parsed.query)
+
+        # tracking por query param
+        for key in ("url", "redirect", "u", "target", "dest", "destination"):
+            if key in qs and qs[key]:
+                candidate = unquote(qs[key][0])
+                if candidate.startswith("http://") or candidate.startswith("https://"):
+                    return candidate
+
+        # a veces viene en el fragment (#)
+        if parsed.fragment:
+            frag = parsed.fragment
+            # ejemplo: #url=https%3A%2F%2F...
+            m = re.search(r"(?:^|&|#)url=([^&]+)", frag, flags=re.IGNORECASE)
+            if m:
+                candidate = unquote(m.group(1))
+                if candidate.startswith("http://") or candidate.startswith("https://"):
+                    return candidate
+
+    except Exception:
+        pass
+    return url
+
+
+def canonical_linkedin_job_url(url: str, is_cta: bool = False) -> str | None:
+    """LinkedIn: solo /jobs/view/<id> (o ?currentJobId=<id>), normalizado. `is_cta` no aplica."""
+    try:
+        u = _unwrap_tracking(url)
+        p = urlparse(u)
+        host = (p.netloc or "").lower()
+
+        if host.endswith("lnkd.in"):
+            return None
+        if "linkedin.com" not in host:
+            return None
+
+        path = p.path or ""
+        q = parse_qs(p.query)
+
+        m = re.search(r"/jobs/view/(\d+)", path)
+        if m:
+            job_id = m.group(1)
+            return f"https://www.linkedin.com/jobs/view/{job_id}/"
+
+        for key in ("currentjobid", "jobid", "currentJobId", "jobId"):
+            if key in q and q[key]:
+                job_id = q[key][0]
+                if job_id.isdigit():
+                    return f"https://www.linkedin.com/jobs/view/{job_id}/"
+
+        return None
+    except Exception:
+        return None
+
+
+def canonical_computrabajo_url(url: str, is_cta: bool = False) -> str | None:
+    """
+    Computrabajo: hay correos con link directo de oferta (oferta-de-trabajo),
+    y otros donde el CTA es "Revisa la selección" y lleva a una página de selección/campaña.
+
+    Regla:
+    - Si es link computrabajo, lo aceptamos si NO es "basura" (unsubscribe/privacy/etc.)
+    - Si además coincide patrón "oferta", perfecto.
+    - Si NO coincide patrón oferta, solo lo aceptamos si viene del CTA (is_cta=True).
+    """
+    try:
+        u = _unwrap_tracking(url)
+        p = urlparse(u)
+        host = (p.netloc or "").lower()
+
+        if "computrabajo" not in host:
+            return None
+
+        path = (p.path or "").lower()
+
+        # filtrar basura
+        if _CT_BAD_PATH_RE.search(path):
+            return None
+
+        # patrón fuerte (oferta directa)
+        is_offer_like = (
+            ("/ofertas-de-trabajo/" in path and "oferta-de-trabajo" in path)
+            or ("/oferta" in path)
+            or ("oferta-de-trabajo" in path)
+        )
+
+        # si no parece oferta directa, solo aceptar si viene del CTA
+        if not is_offer_like and not is_cta:
+            return None
+
+        # canonical: quitar query/fragment (utm, tracking, etc.)
+        canon = urlunparse((p.scheme or "https", p.netloc, p.path, "", "", ""))
+        return canon
+
+    except Exception:
+        return None
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+
+def load_json(path: str | Path, default: Any) -> Any:
+    """
+    Lee un archivo JSON de estado persistente.
+
+    Si no existe o esta corrupto, retorna `default` (nunca lanza).
+    """
+    path = Path(path)
+    if not path.exists():
+        return default
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path: str | Path, data: Any) -> None:
+    """
+    Escribe `data` como JSON de forma atomica (archivo temporal + replace),
+    para no dejar el estado a medias si el proceso muere escribiendo.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from utils.MACROS import LINK_CACHE_PATH, LINK_CACHE_PERSIST_MAX
+from utils.json_store import load_json, save_json
+
+# valor guardado: [link_canonico, nombre_del_tipo] o [None, None] si no es oferta
+LinkCacheEntry = list
+
+
+def link_cache_key(url: str, is_cta: bool) -> str:
+    return f"{int(bool(is_cta))}|{url}"
+
+
+def load_link_cache(version: int, path: str = LINK_CACHE_PATH) -> dict[str, LinkCacheEntry]:
+    """
+    Carga el mapeo persistente {url cruda -> link canónico}.
+
+    Si fue generado por otra versión de los canonicalizadores se descarta
+    completo: sus resultados ya no son confiables.
+    """
+    state = load_json(path, {})
+    if not isinstance(state, dict) or state.get("version") != version:
+        return {}
+    links = state.get("links")
+    return links if isinstance(links, dict) else {}
+
+
+def save_link_cache(
+    links: dict[str, LinkCacheEntry],
+    version: int,
+    path: str = LINK_CACHE_PATH,
+    max_entries: int = LINK_CACHE_PERSIST_MAX,
+) -> None:
+    """Guarda el mapeo, quedándose con las `max_entries` entradas más recientes."""
+    if len(links) > max_entries:
+        links = dict(list(links.items())[-max_entries:])
+    save_json(path, {"version": version, "links": links})
@@ -1,9 +1,9 @@
 from pathlib import Path
 from typing import List
 import pandas as pd
-from utils.MACROS import OFFER_COLUMNS
+from utils.MACROS import OFFER_COLUMNS, OPTIONAL_OFFER_COLUMNS
 from utils.Offer import Offer
-from utils.OfferTypeEnum import OfferTypeEnum
+from utils.job_sources import source_for_link
 
 
 def load_offers_from_excel(
@@ -13,6 +13,11 @@ def load_offers_from_excel(
     """
     Lee un Excel cuyas columnas corresponden a TODOS los campos de Offer:
     id, link, reception_date, father_mail_subject, affinity, description
+    (y description_hash, opcional en excels viejos)
+
+    Las filas cuyo link no es de ninguna fuente registrada (agregadas a mano,
+    o de una fuente que se quitó) se conservan con `type=None`: no se buscan
+    sus descripciones pero siguen en el excel.
 
     Retorna List[Offer].
     """
@@ -23,7 +28,7 @@ def load_offers_from_excel(
     df = pd.read_excel(excel_path, sheet_name=sheet_name)
 
     # Validación: deben existir todas las columnas del modelo
-    missing = [c for c in OFFER_COLUMNS if c not in df.columns]
+    missing = [c for c in OFFER_COLUMNS if c not in df.columns and c not in OPTIONAL_OFFER_COLUMNS]
     if missing:
         raise ValueError(
             f"Faltan columnas en el Excel: {missing}. "
@@ -43,7 +48,8 @@ def load_offers_from_excel(
             print("Ignorando fila al leer el sheets")
             continue
 
-        o = Offer(str(link).strip(), rdate, str(subject), type_=OfferTypeEnum.LINKEDIN if "linkedin" in link else OfferTypeEnum.COMPUTRABAJO)
+        link = str(link).strip()
+        o = Offer(link, rdate, str(subject), type_=source_for_link(link))
 
         # affinity (columna obligatoria, puede venir vacía)
         raw_aff = row["affinity"]
@@ -53,6 +59,12 @@ def load_offers_from_excel(
         raw_desc = row["description"]
         o.description = None if raw_desc is None or pd.isna(raw_desc) else str(raw_desc)
 
+        # excels escritos con la descripcion solo en la primera fila de cada hash:
+        # las demas la recuperan por el hash
+        raw_hash = row.get("description_hash")
+        if o.description_hash is None and raw_hash is not None and not pd.isna(raw_hash):
+            o.description_hash = str(raw_hash)
+
         offers.append(o)
 
     return offers
@@ -3,11 +3,13 @@ from utils.Offer import Offer
 def offer_filter_handler(offers: list[Offer]) -> list[Offer]:
     """
     Retorna una nueva lista con solo las ofertas que tienen description.
+    Las de una fuente no registrada (type None) se conservan siempre: su
+    descripcion no se puede buscar y son filas que el usuario tiene en el excel.
     
     :param offers: Lista de objetos Offer
     :return: Lista filtrada de objetos Offer con description no nula
     """
     print("Eliminando ofertas sin description")
-    new_offer_list = [offer for offer in offers if offer.description is not None]
+    new_offer_list = [offer for offer in offers if offer.description is not None or offer.type is None]
     print(f"Se eliminaron {len(offers)-len(new_offer_list)} ofertas")
     return new_offer_list
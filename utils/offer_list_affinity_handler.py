@@ -1,73 +1,281 @@
-from utils.MACROS import OFFER_BATCH_SIZE
-from utils.gemini_query import gemini_query
-from utils.generate_prompt import generate_prompt
+import asyncio
+import json
+
+from utils.MACROS import (
+    BASE_PROMPT,
+    GEMINI_BATCH_INPUT_TOKENS,
+    GEMINI_BATCH_OUTPUT_TOKENS,
+    GEMINI_MAX_CONCURRENCY,
+    GEMINI_MAX_DESCRIPTION_TOKENS,
+    GEMINI_MAX_RETRIES,
+    GEMINI_MAX_SCORE_ATTEMPTS,
+    GEMINI_MODEL,
+    GEMINI_OUTPUT_TOKENS_PER_OFFER,
+    GEMINI_RESCORE_PER_RUN,
+)
+from utils.affinity_cache import AffinityCache, current_prompt_hash
+from utils.gemini_budget import GeminiBudget
+from utils.gemini_context import is_cache_error, prepare_gemini_context
+from utils.gemini_query import gemini_query_async, get_gemini_client
+from utils.generate_prompt import generate_descriptions_prompt, generate_prompt, offer_section
 from utils.logging import success, error
+from utils.token_packer import TokenEstimator, pack_by_tokens
 
 
-def _get_offer_batch_affinity(offers):
+async def _get_offer_batch_affinity(offers, context=None, max_chars=None):
     """
         Hara la consulta a gemini enviando batches de ofertas para aprovechar mejor
         los limites impuestos por gemini
 
-        Gemini respondera con el siguiente formato :
-            id-calificacion;di-calificacion...
+        Si `context` ya lleva las instrucciones (system_instruction o cache),
+        el prompt solo contiene las descripciones (recortadas a `max_chars`).
+
+        Gemini respondera JSON con el siguiente formato :
+            [{"id": "...", "score": 1-10}, ...]
 
         Retorna la respuesta de gemini
     """
-    prompt = generate_prompt(offers)
-    gemini_response = gemini_query(prompt)
+    if context is None or context.sends_instructions:
+        prompt = generate_prompt(offers, max_chars)
+    else:
+        prompt = generate_descriptions_prompt(offers, max_chars)
+    gemini_response = await gemini_query_async(prompt, context)
     return gemini_response
 
 def _set_offer_batch_affinity_by_gemini_response(gemini_response, offers_list):
     """
-        Recibe respuesta de gemini con el siguiente formato:
-            id-calificacion;di-calificacion...
+        Recibe la respuesta JSON de gemini (AFFINITY_RESPONSE_SCHEMA):
+            [{"id": "...", "score": 1-10}, ...]
+
+        Ajusta la afinidad de cada oferta con una entrada valida (id del
+        batch, score entero 1-10; si un id se repite vale la primera).
+        Retorna las ofertas que quedaron sin afinidad (faltantes o invalidas),
+        para volver a encolarlas. Una respuesta que no es JSON las deja todas.
+    """
+    by_id = {str(o.id): o for o in offers_list}
+    try:
+        entries = json.loads(gemini_response or "")
+    except ValueError:
+        error("La respuesta de gemini no es JSON valido")
+        entries = []
+    if not isinstance(entries, list):
+        error("La respuesta de gemini no es un arreglo JSON")
+        entries = []
+
+    scored = set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        id_, score = str(entry.get("id", "")).strip(), entry.get("score")
+        if id_ not in by_id or id_ in scored:
+            continue
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or score != int(score) or not 1 <= score <= 10:
+            error(f"Afinidad invalida para la oferta {id_} : {score!r}")
+            continue
+        by_id[id_].affinity = int(score)
+        scored.add(id_)
+        success(f"Afinidad asignada a oferta : {id_}")
+
+    return [o for o in offers_list if str(o.id) not in scored]
+
+
+def _plan_scoring(offers_list, cache, prompt_hash, rescore_limit):
+    """
+        Aplica las afinidades del cache a todas las ofertas y decide que
+        consultar a gemini, con UNA oferta representante por descripcion:
 
-        Y ajusta la afinidad de cada oferta correspondiente.
+        - faltantes: descripciones sin afinidad conocida.
+        - viejas: descripciones cuya afinidad es de otro prompt/modelo, hasta
+          `rescore_limit` (None = todas), las mas antiguas primero.
 
+        Las representantes quedan sin afinidad; si su consulta falla,
+        `cache.apply` les devuelve la anterior.
     """
-    i = 0
-    for calification_pairs in gemini_response.split(';'):
-        id_, calification = calification_pairs.split('_')
-        for o in offers_list:
-            if str(o.id) == id_:
-                success(f"Afinidad asignada a oferta : {o.id}")
-                i +=1
-                o.affinity = int(calification)
+    cache.seed(offers_list)
+    cache.apply(offers_list)
+
+    # sin descripcion (p.ej. filas de una fuente no registrada) no hay nada que evaluar
+    representatives = {}
     for o in offers_list:
-        if not o.affinity:
-            error(f"La oferta {o.id} perteneciente a {o.father_mail_subject} no tiene afinidad !!")
+        if o.description_hash:
+            representatives.setdefault(o.description_hash, o)
+
+    missing = [o for o in representatives.values() if not o.affinity]
+    stale = cache.stale(prompt_hash, GEMINI_MODEL, keys=[o.description_hash for o in representatives.values() if o.affinity])
+    if rescore_limit is not None:
+        stale = stale[:max(0, rescore_limit)]
+    stale = [representatives[k] for k in stale]
+    for o in stale:
+        o.affinity = None
+    return missing, stale
 
 
+def _record_scores(offers, cache, prompt_hash):
+    for o in offers:
+        if o.affinity and o.description_hash:
+            cache.put(o.description_hash, o.affinity, prompt_hash, GEMINI_MODEL)
 
 
-def offer_list_affinity_handler(offers_list, batch_size=OFFER_BATCH_SIZE):
+def _retry_delay(e):
     """
-        Se encarga de tomar toda la lista de ofertas y ajustar su afinidad
-        por batches cuyo tamanio esta determinado por OFFER_BATCH_SIZE
-    """
-    i = 0
-    offer_batch = None
-    non_set_affinity_offer_list = [o for o in offers_list if not o.affinity]
-    if len(non_set_affinity_offer_list) > 0:
-        while i != -1:
-            if (len(non_set_affinity_offer_list)-i) < batch_size:
-                offer_batch = non_set_affinity_offer_list[i:]
-                i = -1
-            else:
-                offer_batch = non_set_affinity_offer_list[i:i+batch_size]
-                i+=batch_size
-            if len(offer_batch) > 0:
-                print(f"Enviando {len(offer_batch)} ofertas a gemini para encontrar su afinidad")
-                try:
-                    gemini_response = _get_offer_batch_affinity(offer_batch)
-                    _set_offer_batch_affinity_by_gemini_response(gemini_response, offer_batch)
-                except Exception as e:
-                    error("Error en el consumo de gemini, saliendo del bucle")
+        Segundos que pide esperar gemini en un 429 (RetryInfo.retryDelay, p.ej. "37s").
+        None si el error no es de cuota.
+    """
+    if getattr(e, "code", None) != 429:
+        return None
+    details = getattr(e, "details", None) or {}
+    for d in (details.get("error", {}).get("details") or []) if isinstance(details, dict) else []:
+        delay = str(d.get("retryDelay", "")) if isinstance(d, dict) else ""
+        if delay.endswith("s"):
+            try:
+                return float(delay[:-1])
+            except ValueError:
+                pass
+    return 60.0
+
+
+async def _score_batch(offer_batch, budget, semaphore, context=None, max_chars=None):
+    """
+        Consulta a gemini por un batch. Ante un 429 pausa a todos los batches
+        (budget.pause) y reintenta; si el cache de instrucciones desaparecio
+        (vencido o borrado) pasa el contexto a system_instruction y reintenta;
+        ante otro error lo reporta y sigue con el resto.
+
+        Retorna las ofertas a re-encolar (sin afinidad tras la respuesta, o
+        todo el batch si la consulta fallo). Si se agoto el presupuesto
+        diario no retorna ninguna: quedan para la proxima corrida.
+    """
+    async with semaphore:
+        for _ in range(GEMINI_MAX_RETRIES):
+            if not await budget.acquire():
+                error(f"Presupuesto diario de gemini agotado: {len(offer_batch)} ofertas quedan para la proxima corrida")
+                return []
+            print(f"Enviando {len(offer_batch)} ofertas a gemini para encontrar su afinidad")
+            used_cache = context is not None and context.mode == "cache"
+            try:
+                gemini_response = await _get_offer_batch_affinity(offer_batch, context, max_chars)
+                return _set_offer_batch_affinity_by_gemini_response(gemini_response, offer_batch)
+            except Exception as e:
+                if used_cache and is_cache_error(e):
+                    error(f"El cache de gemini ya no esta disponible, se sigue con system_instruction : {e}")
+                    context.use_system_instruction()
+                    continue
+                delay = _retry_delay(e)
+                if delay is None:
+                    error("Error en el consumo de gemini para un batch, se sigue con los demas")
                     error(str(e))
-                    break
+                    return offer_batch
+                error(f"Cuota de gemini alcanzada, pausando {delay:.0f}s")
+                budget.pause(delay)
+        error(f"Se agotaron los reintentos de un batch de {len(offer_batch)} ofertas")
+        return offer_batch
+
+
+async def _score_offers(offers, pack, budget, max_concurrency, context=None, max_chars=None):
+    """
+        Consulta a gemini por rondas: cada ronda arma batches (`pack`) con lo
+        pendiente y las ofertas que quedaron sin afinidad valida vuelven a la
+        cola de la siguiente, hasta GEMINI_MAX_SCORE_ATTEMPTS intentos cada una.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    attempts = {}
+    pending = offers
+    while pending and budget.remaining_today:
+        results = await asyncio.gather(
+            *(_score_batch(b, budget, semaphore, context, max_chars) for b in pack(pending))
+        )
+        pending = []
+        for o in (o for requeue in results for o in requeue):
+            attempts[o.id] = attempts.get(o.id, 0) + 1
+            if attempts[o.id] < GEMINI_MAX_SCORE_ATTEMPTS:
+                pending.append(o)
             else:
-                break
-    else:
+                error(f"La oferta {o.id} perteneciente a {o.father_mail_subject} no tiene afinidad !!")
+        if pending:
+            print(f"{len(pending)} ofertas vuelven a la cola de gemini")
+
+
+def _pack_offers(offers, estimator, max_chars, context, max_input_tokens, max_output_tokens):
+    """
+        Arma la menor cantidad de batches que quepan en el presupuesto de tokens
+        de entrada (descripciones + instrucciones si viajan en el prompt) y de
+        salida (una respuesta corta por oferta).
+    """
+    overhead = estimator.estimate(BASE_PROMPT) if context.sends_instructions else 0
+    costs = [estimator.estimate(offer_section(o, max_chars)) for o in offers]
+    return pack_by_tokens(
+        offers,
+        costs,
+        max_input_tokens=max(1, max_input_tokens - overhead),
+        max_items=max_output_tokens // GEMINI_OUTPUT_TOKENS_PER_OFFER,
+    )
+
+
+def offer_list_affinity_handler(
+    offers_list,
+    max_concurrency=GEMINI_MAX_CONCURRENCY,
+    max_input_tokens=GEMINI_BATCH_INPUT_TOKENS,
+    max_output_tokens=GEMINI_BATCH_OUTPUT_TOKENS,
+    rescore_limit=GEMINI_RESCORE_PER_RUN,
+):
+    """
+        Se encarga de tomar toda la lista de ofertas y ajustar su afinidad
+        por batches armados por tokens estimados: cada request se llena hasta
+        `max_input_tokens` / `max_output_tokens` para hacer la menor cantidad
+        de llamadas. Las descripciones demasiado largas se recortan
+        (GEMINI_MAX_DESCRIPTION_TOKENS).
+
+        Hasta `max_concurrency` batches se consultan a la vez (cliente async),
+        respetando el presupuesto de requests por minuto/dia (GEMINI_RPM,
+        GEMINI_RPD). El uso diario se guarda entre corridas: si se agota, lo
+        pendiente se retoma en la siguiente en lugar de abortar.
+
+        Solo se envia a gemini una oferta por descripcion distinta; el resultado
+        se guarda en el cache de afinidad (description_hash, prompt, modelo) y
+        se copia a las demas ofertas con la misma descripcion. Si BASE_PROMPT o
+        el modelo cambian, las afinidades viejas se siguen usando y se
+        recalculan hasta `rescore_limit` por corrida, las mas antiguas primero,
+        despues de las ofertas que no tienen afinidad.
+
+        Las instrucciones fijas (BASE_PROMPT y CV) se preparan una vez por
+        corrida segun GEMINI_PROMPT_MODE; cada batch manda solo descripciones.
+    """
+    cache = AffinityCache.load()
+    prompt_hash = current_prompt_hash()
+    missing, stale = _plan_scoring(offers_list, cache, prompt_hash, rescore_limit)
+    if not missing and not stale:
+        cache.save()
         print("Todas las ofertas dispuestas cuentan ya con afinidad !")
+        return
+    if stale:
+        print(f"Recalculando {len(stale)} afinidades de un prompt/modelo anterior")
+    to_score = missing + stale
+
+    context = prepare_gemini_context()
+    estimator = TokenEstimator.load()
+    estimator.calibrate(get_gemini_client(), [o.description for o in to_score])
+    estimator.save()
+    max_chars = estimator.chars_for(GEMINI_MAX_DESCRIPTION_TOKENS)
+    stale_ids = {o.id for o in stale}
+
+    def pack(pending):
+        # las faltantes van primero: si se agota el presupuesto, lo que queda es recalculo
+        groups = ([o for o in pending if o.id not in stale_ids], [o for o in pending if o.id in stale_ids])
+        return [
+            batch
+            for group in groups if group
+            for batch in _pack_offers(group, estimator, max_chars, context, max_input_tokens, max_output_tokens)
+        ]
+
+    budget = GeminiBudget.load()
+    print(f"{len(to_score)} ofertas para gemini ({budget.remaining_today} requests disponibles hoy)")
+    try:
+        asyncio.run(_score_offers(to_score, pack, budget, max_concurrency, context, max_chars))
+    finally:
+        budget.save()
+        _record_scores(to_score, cache, prompt_hash)
+        cache.save()
 
+    # la afinidad de cada representante vale para todas las ofertas con su descripcion
+    # (y las que no se pudieron recalcular recuperan la anterior)
+    cache.apply(offers_list)
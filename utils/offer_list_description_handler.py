@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from utils.Offer import Offer
+from utils.failure_ledger import FailureLedger
+from utils.http_cache import prune_http_cache
+from utils.get_computrabajo_description import extraction_strategy_counts
+from utils.job_sources import JobSource, iter_sources
+from utils.logging import success, error
+from utils.rate_limiter import AdaptiveRateLimiter, THROTTLE_STATUSES, load_rate_limiters, save_rate_limiters
+from utils.redirect_cache import save_redirects
+from utils.scraper_errors import DescriptionParseError, HttpStatusError
+
+
+def _apply_result(
+    offer: Offer,
+    result: str | Exception,
+    limiter: AdaptiveRateLimiter,
+    ledger: FailureLedger | None,
+) -> bool:
+    if not isinstance(result, Exception):
+        offer.description = result
+        limiter.on_success()
+        if ledger is not None:
+            ledger.record_success(offer.id)
+        success(f"Se ajusto la descripcion de la oferta : {offer.link[:50]}")
+        return True
+
+    e = result
+    if isinstance(e, HttpStatusError) and e.status_code in THROTTLE_STATUSES:
+        limiter.on_throttled(e.retry_after)
+        error(f"{limiter.name}: bajando a {limiter.rate:.3f} req/s")
+    elif isinstance(e, HttpStatusError):
+        # 404 y similares: el servidor respondio bien, no es motivo para frenar
+        limiter.on_success()
+    error(f"ERROR ajustando oferta {offer.link[:50]} perteneciente a **{offer.father_mail_subject[:30]}** ")
+    error(str(e))
+    entry = ledger.record_failure(offer, e) if ledger is not None else None
+    if entry is not None and entry["permanent"]:
+        error(f"Oferta {offer.link[:50]} marcada como fallo permanente ({entry['error']})")
+    return False
+
+
+def _set_offer_description(
+    offer: Offer,
+    limiter: AdaptiveRateLimiter,
+    http_cache: bool,
+    ledger: FailureLedger | None,
+) -> list[bool]:
+    print(f"Ajustando la descripcion de la oferta : {offer.link[:50]}")
+    # Se accede a la fuente de la oferta, se extrae la description y se setea.
+    # El limiter se consulta antes de cada request real: lo servido desde el cache HTTP no espera
+    try:
+        result = offer.type.fetch_description(offer.link, use_cache=http_cache, throttle=limiter.acquire)
+    except Exception as e:
+        result = e
+    return [_apply_result(offer, result, limiter, ledger)]
+
+
+def _set_offers_description_batch(
+    source: JobSource,
+    offers: list[Offer],
+    limiter: AdaptiveRateLimiter,
+    http_cache: bool,
+    ledger: FailureLedger | None,
+) -> list[bool]:
+    print(f"Ajustando {len(offers)} descripciones de {source.name} en un lote")
+    try:
+        results = source.fetch_batch([o.link for o in offers], use_cache=http_cache, throttle=limiter.acquire)
+    except Exception as e:
+        results = {o.link: e for o in offers}
+    missing = DescriptionParseError(f"❌ El lote de {source.name} no trajo esta oferta.")
+    return [_apply_result(o, results.get(o.link, missing), limiter, ledger) for o in offers]
+
+
+def offer_list_description_handler(
+    offers_list: list[Offer],
+    http_cache: bool = True,
+    ledger: FailureLedger | None = None,
+) -> tuple[int, int]:
+    """
+        Ajusta la descripcion de todas las ofertas que no la tengan.
+
+        Cada fuente registrada en utils.job_sources tiene su propio pool de
+        hilos con su propio limite de concurrencia y su rate limiter adaptativo,
+        asi una fuente lenta o frenada no bloquea a las demas. Las fuentes que
+        soportan lotes (`fetch_batch`) reciben sus ofertas de a `batch_size`.
+        La tasa aprendida se guarda al final.
+
+        Con `http_cache` las respuestas se leen/guardan en el cache HTTP en disco
+        (utils.http_cache), asi reintentos y corridas repetidas no gastan requests;
+        al final se borran las entradas que pasaron HTTP_CACHE_MAX_AGE sin renovarse.
+
+        Con `ledger` (utils.failure_ledger) se saltan las ofertas con fallo
+        permanente o cuyo proximo reintento todavia no llego, y se registra
+        el resultado de cada intento.
+
+        Retorna (exitos, errores).
+    """
+    pending: dict[JobSource, list[Offer]] = {}
+    for offer in offers_list:
+        if offer.description:
+            print(f"Saltando oferta {offer.link[:50]} por que ya cuenta con descripcion")
+            continue
+        if offer.type is None:
+            print(f"Saltando oferta {offer.link[:50]} por que no es de una fuente registrada")
+            continue
+        reason = ledger.skip_reason(offer.id) if ledger is not None else None
+        if reason:
+            print(f"Saltando oferta {offer.link[:50]} : {reason}")
+            continue
+        pending.setdefault(offer.type, []).append(offer)
+
+    if not pending:
+        print("Todas las ofertas dispuestas cuentan ya con descripcion !")
+        return 0, 0
+
+    limiters = load_rate_limiters({s.name: s.rate_limit for s in iter_sources()})
+    executors: list[ThreadPoolExecutor] = []
+    futures = []
+    try:
+        for source, offers in pending.items():
+            workers = max(1, source.max_concurrency)
+            limiter = limiters[source.name]
+            print(f"Buscando {len(offers)} descripciones de {source.name} ({workers} en paralelo, {limiter.rate:.3f} req/s)")
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"desc-{source.name.lower()}")
+            executors.append(executor)
+            if source.batchable:
+                for i in range(0, len(offers), source.batch_size):
+                    batch = offers[i:i + source.batch_size]
+                    futures.append(executor.submit(_set_offers_description_batch, source, batch, limiter, http_cache, ledger))
+            else:
+                futures.extend(executor.submit(_set_offer_description, o, limiter, http_cache, ledger) for o in offers)
+        wait(futures)
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=True)
+        save_rate_limiters(limiters)
+        save_redirects()
+        if http_cache:
+            pruned = prune_http_cache()
+            if pruned:
+                print(f"Cache HTTP: {pruned} entradas viejas borradas")
+
+    strategies = extraction_strategy_counts()
+    if strategies:
+        print("Estrategias de extraccion Computrabajo : " + " | ".join(f"{k}: {v}" for k, v in sorted(strategies.items())))
+
+    results = [r for f in futures for r in f.result()]
+    ok = sum(results)
+    return ok, len(results) - ok
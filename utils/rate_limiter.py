@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from utils.MACROS import (
+    RATE_LIMIT_RECOVERY_HALF_LIFE,
+    RATE_LIMIT_START_MIN_FRACTION,
+    RATE_LIMITS,
+    RATE_LIMITS_STATE_PATH,
+)
+from utils.json_store import load_json, save_json
+
+# status con los que el servidor nos pide bajar la velocidad
+THROTTLE_STATUSES = (999, 429, 403)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket por fuente cuya tasa (requests/segundo) se adapta a las
+    respuestas del servidor:
+
+    - 999/429/403: la tasa se divide por `backoff_factor` (retroceso exponencial)
+      y no se emite nada hasta que pase el Retry-After (o 1/tasa).
+    - `recovery_after` éxitos seguidos: la tasa sube un `recovery_factor`,
+      sin pasar de `max_rate`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        burst: float = 1.0,
+        backoff_factor: float = 2.0,
+        recovery_factor: float = 1.1,
+        recovery_after: int = 10,
+    ) -> None:
+        self.name = name
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.burst = burst
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self.recovery_after = recovery_after
+
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._success_streak = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self) -> None:
+        """Bloquea hasta que haya un token disponible."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._success_streak += 1
+            if self._success_streak >= self.recovery_after:
+                self._success_streak = 0
+                self.rate = min(self.max_rate, self.rate * self.recovery_factor)
+
+    def on_throttled(self, retry_after: float | None = None) -> None:
+        with self._lock:
+            self._success_streak = 0
+            self.rate = max(self.min_rate, self.rate / self.backoff_factor)
+            self._tokens = 0.0
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+
+
+def _recovered_rate(learned: float, start: float, elapsed: float, half_life: float) -> float:
+    """
+    Una tasa aprendida por debajo de la inicial se acerca a ella con el tiempo
+    (la distancia en escala logaritmica se reduce a la mitad cada `half_life`):
+    una racha de 403/429 en una corrida no condena a las siguientes a ir al minimo.
+    """
+    if learned >= start:
+        return learned
+    return start * (learned / start) ** (0.5 ** (max(0.0, elapsed) / half_life))
+
+
+def load_rate_limiters(
+    configs: dict[str, dict] = RATE_LIMITS,
+    path: str = RATE_LIMITS_STATE_PATH,
+    half_life: float = RATE_LIMIT_RECOVERY_HALF_LIFE,
+) -> dict[str, AdaptiveRateLimiter]:
+    """
+    Crea un limiter por fuente ({nombre: {rate, min_rate, max_rate}}, por defecto
+    RATE_LIMITS), arrancando desde la tasa aprendida en corridas anteriores si existe.
+    Si esa tasa quedo por debajo de la configurada, se recupera segun el tiempo
+    transcurrido desde que se guardo (ver `_recovered_rate`), y nunca arranca
+    por debajo de RATE_LIMIT_START_MIN_FRACTION de la configurada.
+    """
+    learned = load_json(path, {})
+    if not isinstance(learned, dict):
+        learned = {}
+    limiters: dict[str, AdaptiveRateLimiter] = {}
+    for source, cfg in configs.items():
+        rate = float(cfg["rate"])
+        entry = learned.get(source)
+        # formato viejo: solo la tasa, sin fecha (se toma como guardada hace mucho)
+        if isinstance(entry, (int, float)):
+            entry = {"rate": entry, "saved_at": 0}
+        if isinstance(entry, dict) and isinstance(entry.get("rate"), (int, float)) and entry["rate"] > 0:
+            elapsed = time.time() - float(entry.get("saved_at", 0))
+            rate = max(
+                _recovered_rate(float(entry["rate"]), rate, elapsed, half_life),
+                rate * RATE_LIMIT_START_MIN_FRACTION,
+            )
+        limiters[source] = AdaptiveRateLimiter(
+            name=source,
+            rate=rate,
+            min_rate=cfg["min_rate"],
+            max_rate=cfg["max_rate"],
+        )
+    return limiters
+
+
+def save_rate_limiters(limiters: dict[str, AdaptiveRateLimiter], path: str = RATE_LIMITS_STATE_PATH) -> None:
+    now = time.time()
+    save_json(path, {
+        source: {"rate": round(limiter.rate, 6), "saved_at": now}
+        for source, limiter in limiters.items()
+    })
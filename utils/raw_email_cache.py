@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import gzip
+import os
+import re
+from pathlib import Path
+from typing import Iterator
+
+from utils.MACROS import RAW_EMAIL_CACHE_DIR, RAW_FETCH_MAX_BYTES
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", value) or "_"
+
+
+class RawEmailCache:
+    """
+    Cache en disco de los correos descargados por IMAP, comprimidos con gzip.
+
+    La clave es (buzón, UIDVALIDITY, UID): es estable mientras el UIDVALIDITY
+    no cambie y se conoce ANTES de descargar, así que un hit evita el fetch.
+    Cada entrada guarda además el `fetch_mode` que produjo los bytes:
+
+        <RAW_EMAIL_CACHE_DIR>/<buzón>/<uidvalidity>/<uid>.<modo>.eml.gz
+
+    Una entrada "raw" son los primeros RAW_FETCH_MAX_BYTES del mensaje: si
+    llegó al tope puede faltarle el HTML del final, así que en modo
+    "structure" cuenta como miss y se vuelve a descargar. Una entrada
+    "structure" sirve para ambos modos. Las entradas viejas sin modo
+    (`<uid>.eml.gz`) son "raw".
+    """
+
+    def __init__(
+        self,
+        mailbox: str,
+        uidvalidity: int,
+        root: str | Path = RAW_EMAIL_CACHE_DIR,
+        fetch_mode: str = "raw",
+    ) -> None:
+        self.dir = Path(root) / _safe_name(mailbox) / str(uidvalidity)
+        self.fetch_mode = fetch_mode
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, uid: int) -> list[tuple[str, Path]]:
+        # la entrada "structure" primero: sirve siempre
+        return [
+            ("structure", self.dir / f"{uid}.structure.eml.gz"),
+            ("raw", self.dir / f"{uid}.raw.eml.gz"),
+            ("raw", self.dir / f"{uid}.eml.gz"),
+        ]
+
+    def get(self, uid: int) -> bytes | None:
+        for mode, path in self._paths(uid):
+            raw = read_cached_email(path) if path.exists() else b""
+            if not raw:
+                continue
+            if mode == "raw" and self.fetch_mode == "structure" and len(raw) >= RAW_FETCH_MAX_BYTES:
+                continue  # cortado en el tope del fetch raw
+            self.hits += 1
+            return raw
+        self.misses += 1
+        return None
+
+    def put(self, uid: int, raw: bytes) -> None:
+        if not raw:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self.dir / f"{uid}.{self.fetch_mode}.eml.gz"
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with gzip.open(tmp, "wb", compresslevel=6) as f:
+            f.write(raw)
+        os.replace(tmp, path)
+        # una sola entrada por UID
+        for _mode, other in self._paths(uid):
+            if other != path:
+                other.unlink(missing_ok=True)
+
+
+def iter_cached_emails(mailbox: str, root: str | Path = RAW_EMAIL_CACHE_DIR) -> Iterator[tuple[str, Path]]:
+    """
+    Recorre todos los correos cacheados de `mailbox` (todas las UIDVALIDITY),
+    del más nuevo al más viejo. Entrega (clave, ruta) sin leer el contenido.
+    """
+    base = Path(root) / _safe_name(mailbox)
+    if not base.exists():
+        return
+    entries: dict[tuple[int, int], Path] = {}
+    for validity_dir in base.iterdir():
+        if not validity_dir.is_dir() or not validity_dir.name.isdigit():
+            continue
+        for path in validity_dir.glob("*.eml.gz"):
+            uid = path.name.split(".", 1)[0]
+            if not uid.isdigit():
+                continue
+            key = (int(validity_dir.name), int(uid))
+            # si quedaron dos entradas del mismo UID, gana la "structure"
+            if key not in entries or ".structure." in path.name:
+                entries[key] = path
+    for (validity, uid), path in sorted(entries.items(), reverse=True):
+        yield f"{validity}:{uid}", path
+
+
+def read_cached_email(path: Path) -> bytes:
+    try:
+        with gzip.open(path, "rb") as f:
+            return f.read()
+    except (OSError, EOFError):
+        return b""
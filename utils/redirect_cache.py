@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import threading
+
+from utils.MACROS import REDIRECT_CACHE_PATH
+from utils.json_store import load_json, save_json
+
+_lock = threading.Lock()
+_redirects: dict[str, str] | None = None
+_dirty = False
+
+
+def _loaded(path: str) -> dict[str, str]:
+    global _redirects
+    if _redirects is None:
+        state = load_json(path, {})
+        _redirects = state if isinstance(state, dict) else {}
+    return _redirects
+
+
+def lookup_redirect(url: str, path: str = REDIRECT_CACHE_PATH) -> str | None:
+    """URL de oferta a la que ya se resolvió `url` (tracking) en otra corrida."""
+    with _lock:
+        return _loaded(path).get(url)
+
+
+def remember_redirect(url: str, job_url: str, path: str = REDIRECT_CACHE_PATH) -> None:
+    global _dirty
+    with _lock:
+        redirects = _loaded(path)
+        if redirects.get(url) != job_url:
+            redirects[url] = job_url
+            _dirty = True
+
+
+def save_redirects(path: str = REDIRECT_CACHE_PATH) -> None:
+    """Persiste el mapeo {tracking -> oferta} si cambió en esta corrida."""
+    global _dirty
+    with _lock:
+        if not _dirty or _redirects is None:
+            return
+        save_json(path, _redirects)
+        _dirty = False
@@ -1,7 +1,9 @@
 def remove_duplicated_offers(offer_list):
     cleaned_total_offers = []
+    seen_ids = set()
     for offer in offer_list:
-        if offer.id not in [o.id for o in cleaned_total_offers]:
+        if offer.id not in seen_ids:
+            seen_ids.add(offer.id)
             cleaned_total_offers.append(offer)
     return cleaned_total_offers
 
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+# status que indican que la oferta ya no existe: no tiene sentido reintentar
+PERMANENT_STATUSES = (404, 410)
+
+
+class ScrapeError(RuntimeError):
+    """
+    Fallo atribuible a la oferta (y no a la configuración o a un bug),
+    registrable en el ledger de fallos. `permanent` indica si vale la pena
+    reintentarla más adelante.
+    """
+
+    permanent = False
+
+
+class NotAnOfferError(ScrapeError):
+    """El link no lleva a una oferta directa: nunca va a funcionar."""
+
+    permanent = True
+
+
+class UnexpectedContentError(ScrapeError):
+    """La respuesta no es HTML o supera el tamaño máximo permitido."""
+
+    permanent = True
+
+
+class DescriptionParseError(ScrapeError):
+    """La página bajó pero no se pudo extraer la descripción (un arreglo del parser puede resolverlo)."""
+
+
+class HttpStatusError(ScrapeError):
+    """
+    Error HTTP de un scraper, con el status y el Retry-After (segundos) que
+    mandó el servidor, para que el rate limiter pueda reaccionar.
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def permanent(self) -> bool:
+        return self.status_code in PERMANENT_STATUSES
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After puede venir en segundos o como fecha HTTP."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import math
+from typing import Iterable
+
+from utils.MACROS import SEEN_OFFERS_BLOOM_ERROR_RATE, SEEN_OFFERS_BLOOM_THRESHOLD, SEEN_OFFERS_PATH
+from utils.json_store import load_json, save_json
+
+
+class BloomFilter:
+    """
+    Bloom filter simple (double hashing sobre sha1) para historiales enormes.
+    Sin falsos negativos; falsos positivos ~`error_rate` (una oferta nueva
+    podría darse por conocida).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = SEEN_OFFERS_BLOOM_ERROR_RATE) -> None:
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.sha1(item.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def to_dict(self) -> dict:
+        return {
+            "size": self.size,
+            "hashes": self.hashes,
+            "bits": base64.b64encode(bytes(self.bits)).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BloomFilter":
+        bloom = cls.__new__(cls)
+        bloom.size = int(data["size"])
+        bloom.hashes = int(data["hashes"])
+        bloom.bits = bytearray(base64.b64decode(data["bits"]))
+        return bloom
+
+
+class SeenOfferIndex:
+    """
+    Índice persistente de ofertas ya conocidas (links canónicos).
+
+    La ingesta lo consulta ANTES de construir cada Offer, así solo se
+    crean objetos para ofertas realmente nuevas; `skipped` cuenta las omitidas.
+    Si el historial supera SEEN_OFFERS_BLOOM_THRESHOLD se persiste como
+    Bloom filter en lugar del set exacto.
+    """
+
+    def __init__(self, links: Iterable[str] = (), bloom: BloomFilter | None = None) -> None:
+        self.links: set[str] = set(links)
+        self.bloom = bloom
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self.links)
+
+    def __contains__(self, link: str) -> bool:
+        return link in self.links or (self.bloom is not None and link in self.bloom)
+
+    def add(self, link: str) -> None:
+        self.links.add(link)
+
+    def add_offers(self, offers: Iterable) -> None:
+        for o in offers:
+            self.links.add(o.link)
+
+    @classmethod
+    def load(cls, path: str = SEEN_OFFERS_PATH) -> "SeenOfferIndex":
+        state = load_json(path, {})
+        bloom = BloomFilter.from_dict(state["bloom"]) if isinstance(state.get("bloom"), dict) else None
+        return cls(links=state.get("links") or (), bloom=bloom)
+
+    def save(self, path: str = SEEN_OFFERS_PATH, bloom_threshold: int = SEEN_OFFERS_BLOOM_THRESHOLD) -> None:
+        if self.bloom is None and len(self.links) <= bloom_threshold:
+            save_json(path, {"links": sorted(self.links)})
+            return
+
+        # historial muy grande: todo pasa al Bloom filter (tamaño fijo en disco/memoria)
+        if self.bloom is None:
+            self.bloom = BloomFilter(capacity=max(bloom_threshold, len(self.links)) * 4)
+        for link in self.links:
+            self.bloom.add(link)
+        self.links.clear()
+        save_json(path, {"bloom": self.bloom.to_dict()})
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import math
+
+from utils.MACROS import (
+    GEMINI_BATCH_INPUT_TOKENS,
+    GEMINI_BATCH_OUTPUT_TOKENS,
+    GEMINI_CALIBRATION_SAMPLE,
+    GEMINI_MODEL,
+    GEMINI_OUTPUT_TOKENS_PER_OFFER,
+    GEMINI_TOKEN_CALIBRATION_PATH,
+)
+from utils.json_store import load_json, save_json
+from utils.logging import error
+
+# caracteres por token antes de calibrar (texto en español, algo conservador)
+_DEFAULT_CHARS_PER_TOKEN = 3.5
+# con esta cantidad de tokens medidos la calibracion ya no se mueve: no se gastan mas llamadas
+_CALIBRATED_TOKENS = 100_000
+# margen sobre la estimacion local
+_SAFETY = 1.1
+
+
+class TokenEstimator:
+    """
+    Estima tokens de un texto localmente (caracteres / ratio) sin llamar a la API.
+
+    El ratio se calibra con `count_tokens` sobre una muestra de descripciones y se
+    acumula entre corridas (por modelo), hasta tener suficientes tokens medidos.
+    """
+
+    def __init__(self, chars: int = 0, tokens: int = 0, model: str = GEMINI_MODEL) -> None:
+        self.chars = chars
+        self.tokens = tokens
+        self.model = model
+
+    @property
+    def chars_per_token(self) -> float:
+        if self.tokens < 200:
+            return _DEFAULT_CHARS_PER_TOKEN
+        return self.chars / self.tokens
+
+    @property
+    def calibrated(self) -> bool:
+        return self.tokens >= _CALIBRATED_TOKENS
+
+    def estimate(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token * _SAFETY)
+
+    def chars_for(self, tokens: int) -> int:
+        """Cuantos caracteres caben (estimado) en `tokens`."""
+        return int(tokens * self.chars_per_token / _SAFETY)
+
+    def calibrate(self, client, texts: list[str], sample: int = GEMINI_CALIBRATION_SAMPLE) -> None:
+        """Una sola llamada a count_tokens con hasta `sample` textos; si falla se sigue con el ratio actual."""
+        if self.calibrated:
+            return
+        sample_text = "\n\n".join(t for t in texts[:sample] if t)
+        if not sample_text:
+            return
+        try:
+            counted = client.models.count_tokens(model=self.model, contents=sample_text).total_tokens
+        except Exception as e:
+            error(f"No se pudieron contar tokens en gemini, se usa la estimacion local : {e}")
+            return
+        if counted:
+            self.chars += len(sample_text)
+            self.tokens += counted
+
+    @classmethod
+    def load(cls, path: str = GEMINI_TOKEN_CALIBRATION_PATH, model: str = GEMINI_MODEL) -> "TokenEstimator":
+        state = load_json(path, {})
+        entry = state.get(model, {}) if isinstance(state, dict) else {}
+        return cls(chars=int(entry.get("chars", 0)), tokens=int(entry.get("tokens", 0)), model=model)
+
+    def save(self, path: str = GEMINI_TOKEN_CALIBRATION_PATH) -> None:
+        state = load_json(path, {})
+        if not isinstance(state, dict):
+            state = {}
+        state[self.model] = {"chars": self.chars, "tokens": self.tokens}
+        save_json(path, state)
+
+
+def pack_by_tokens(
+    items: list,
+    costs: list[int],
+    max_input_tokens: int = GEMINI_BATCH_INPUT_TOKENS,
+    max_items: int = GEMINI_BATCH_OUTPUT_TOKENS // GEMINI_OUTPUT_TOKENS_PER_OFFER,
+) -> list[list]:
+    """
+    Reparte `items` (con su costo en tokens) en la menor cantidad de batches que
+    respeten `max_input_tokens` y `max_items` por batch (first-fit decreasing).
+
+    Un item que por si solo supera el presupuesto va en un batch propio: quien
+    arma el prompt debe haberlo recortado antes.
+    """
+    max_items = max(1, max_items)
+    order = sorted(range(len(items)), key=lambda i: costs[i], reverse=True)
+    batches: list[list] = []
+    loads: list[int] = []
+    for i in order:
+        for b, load in enumerate(loads):
+            if load + costs[i] <= max_input_tokens and len(batches[b]) < max_items:
+                batches[b].append(items[i])
+                loads[b] += costs[i]
+                break
+        else:
+            batches.append([items[i]])
+            loads.append(costs[i])
+    return batches
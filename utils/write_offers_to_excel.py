@@ -19,6 +19,7 @@ def _offer_to_row(o: Offer) -> Dict[str, Any]:
         "father_mail_subject": o.father_mail_subject,
         "affinity": o.affinity,
         "description": o.description,
+        "description_hash": o.description_hash,
     }
 
 
@@ -29,7 +30,11 @@ def write_offers_to_excel(
 ) -> None:
     """
     Escribe (sobrescribe) un Excel con TODAS las columnas del modelo Offer:
-    id, link, reception_date, father_mail_subject, affinity, description
+    id, link, reception_date, father_mail_subject, affinity, description, description_hash
+
+    Cada fila lleva su descripcion completa, aunque se repita entre avisos
+    reposteados: el excel se lee, filtra y ordena a mano, y una celda vacia
+    perderia el texto. La deduplicacion vive solo en memoria (DescriptionStore).
     """
     excel_path = Path(excel_path)
 